@@ -1,19 +1,33 @@
 import streamlit as st
 import os
+import gc
+import atexit
 import re
 import time
 import json
+import hashlib
+import difflib
+import itertools
+import tempfile
+import threading
+import queue
+import shutil
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
-from llm_handler import LLMHandler
-from code_parser import CodeParser
-from test_generator import TestGenerator
-from git_handler import GitHandler
-from csv_handler import CSVHandler
-from rag_system import RAGSystem
 from security import SecurityManager
+from response_cache import ResponseCache
+from config import config
 from logger import get_app_logger, TestGenerationLogger
 
+try:
+    import orjson  # Optional: faster chat history (de)serialisation
+except ImportError:
+    orjson = None
+
 # ---- Logger -------------------------------------------------------------------
 logger = get_app_logger("streamlit_app")
 test_logger = TestGenerationLogger()
@@ -21,6 +35,22 @@ logger.info("=" * 60)
 logger.info("Test Case Generator – Unified Chat UI (full features)")
 logger.info("=" * 60)
 
+# ---- Input patterns (compiled once per process) ---------------------------------
+_GIT_URL_RE = re.compile(r"(https?://|git@)[\w\.\-@:/~]+?\.git", re.IGNORECASE)
+_GENERATE_RE = re.compile(r"generate", re.IGNORECASE)
+
+
+class _ChatNameTable(dict):
+    """str.translate table mapping non-alphanumeric, non-space characters to '_' (filled on first use)"""
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        value = self[codepoint] = char if char.isalnum() or char == ' ' else '_'
+        return value
+
+
+_CHAT_NAME_TABLE = _ChatNameTable()
+
 # ---- Page config ---------------------------------------------------------------
 st.set_page_config(
     page_title="AI Test Case Generator",
@@ -29,21 +59,111 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ---- Shared resources ----------------------------------------------------------
+@st.cache_resource
+def get_llm_handler():
+    """One LLM client per process; it holds no per-session state"""
+    # Imported on first use so google-generativeai is not loaded at startup
+    from llm_handler import LLMHandler
+    return LLMHandler()
+
+
+@st.cache_resource(show_spinner=False)
+def configure_gc():
+    """
+    Raise the young-generation GC threshold once per process
+
+    Reruns allocate many short-lived widgets/dicts; collect the young
+    generation less often than the default threshold of 700 allocations.
+    """
+    gc.set_threshold(50_000, 10, 10)
+    return True
+
+
+configure_gc()
+
+
+@st.cache_resource
+def get_security_manager():
+    """One security manager per process (patterns are compiled once)"""
+    return SecurityManager()
+
+
+@st.cache_resource
+def get_code_parser():
+    """One code parser per process (stateless, safe to share across threads)"""
+    from code_parser import CodeParser
+    return CodeParser()
+
+
+@st.cache_resource
+def get_csv_handler():
+    """One CSV/report writer per process (it only holds the output directory)"""
+    from csv_handler import CSVHandler
+    return CSVHandler()
+
+
+@st.cache_resource
+def get_git_handler():
+    """One Git handler per process, so repository states are loaded from disk once"""
+    from git_handler import GitHandler
+    return GitHandler()
+
+
+@st.cache_resource
+def get_parse_cache():
+    """Process-wide LRU of parse results keyed by (content digest, file name)"""
+    return OrderedDict(), threading.Lock()
+
+
+@st.cache_resource
+def get_parse_pool():
+    """
+    Worker processes for CPU-bound parsing.
+
+    Spawned rather than forked, since the Streamlit server is multi-threaded.
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@st.cache_resource
+def get_upload_pool():
+    """Shared pool for file I/O off the script thread (uploads, reports, cache pruning)"""
+    return ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2), thread_name_prefix="upload")
+
+
 # ---- Session state -------------------------------------------------------------
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 if "uploaded_files" not in st.session_state:
     st.session_state.uploaded_files = {}
-if "previous_code" not in st.session_state:
-    st.session_state.previous_code = {}
+if "upload_dir" not in st.session_state:
+    st.session_state.upload_dir = tempfile.mkdtemp(prefix="tcg_uploads_")
+    # Sessions end without a hook, so the spool directory goes at process exit
+    atexit.register(shutil.rmtree, st.session_state.upload_dir, ignore_errors=True)
+if "previous_baselines" not in st.session_state:
+    st.session_state.previous_baselines = {}  # name -> path of the last generated-from copy
+if "previous_hashes" not in st.session_state:
+    st.session_state.previous_hashes = {}
+if "parsed_uploads" not in st.session_state:
+    st.session_state.parsed_uploads = {}  # name -> (content digest, parsed data)
+if "upload_keys" not in st.session_state:
+    st.session_state.upload_keys = set()
 if "rag_system" not in st.session_state:
+    # Per-session store (holds this chat's code and tests), so not a cache_resource
+    from rag_system import RAGSystem
     st.session_state.rag_system = RAGSystem()
-if "llm_handler" not in st.session_state:
-    st.session_state.llm_handler = LLMHandler()
 if "security_manager" not in st.session_state:
-    st.session_state.security_manager = SecurityManager()
+    st.session_state.security_manager = get_security_manager()
+if "response_cache" not in st.session_state:
+    st.session_state.response_cache = ResponseCache(threshold=config.RESPONSE_CACHE_THRESHOLD)
 if "generated_tests" not in st.session_state:
     st.session_state.generated_tests = {}
+if "has_test_results" not in st.session_state:
+    st.session_state.has_test_results = False
 if "last_repo_info" not in st.session_state:
     st.session_state.last_repo_info = {}
 if "pending_git" not in st.session_state:
@@ -54,6 +174,8 @@ if "current_repo_csv" not in st.session_state:
     st.session_state.current_repo_csv = {}
 if "current_chat_file" not in st.session_state:
     st.session_state.current_chat_file = None
+if "chat_saved_count" not in st.session_state:
+    st.session_state.chat_saved_count = 0  # Messages of chat_history already appended to current_chat_file
 if "selected_test_types" not in st.session_state:
     st.session_state.selected_test_types = ["Unit Test", "Functional Test"]
 
@@ -73,29 +195,25 @@ def generate_smart_chat_name(chat_history: list, selected_test_types: list = Non
     if not chat_history:
         return "chat"
     
-    # Find first user message
+    # Find the first user message and the first Git URL in one pass
     first_message = None
+    repo_name = None
+    
     for msg in chat_history:
-        if msg['role'] == 'user':
+        if msg['role'] != 'user':
+            continue
+        if first_message is None:
             first_message = msg['content']
+        match = _GIT_URL_RE.search(msg['content'])
+        if match:
+            url = match.group(0).strip()
+            # Extract repo name from URL (e.g., vector_c from vector_c.git)
+            repo_name = url.rstrip('.git').split('/')[-1]
             break
     
     if not first_message:
         return "chat"
     
-    # Extract repo name from any message containing a Git URL
-    repo_name = None
-    git_pat = re.compile(r"(https?://|git@)[\w\.\-@:/~]+?\.git", re.IGNORECASE)
-    
-    for msg in chat_history:
-        if msg['role'] == 'user':
-            match = git_pat.search(msg['content'])
-            if match:
-                url = match.group(0).strip()
-                # Extract repo name from URL (e.g., vector_c from vector_c.git)
-                repo_name = url.rstrip('.git').split('/')[-1]
-                break
-    
     # Detect test types from first message OR use selected types
     message_lower = first_message.lower()
     has_functional = 'functional' in message_lower
@@ -125,10 +243,37 @@ def generate_smart_chat_name(chat_history: list, selected_test_types: list = Non
         if len(words) > 5:
             name += "..."
         # Clean special characters
-        name = ''.join(c if c.isalnum() or c == ' ' else '_' for c in name)
+        name = name.translate(_CHAT_NAME_TABLE)
         return name[:50] if name else "chat"
 
 
+# Column aliases in priority order; the first non-empty one wins
+CSV_FILE_COLUMNS = ('File', 'Source File', 'file', 'Target File')
+CSV_TARGET_COLUMNS = (
+    'Target', 'target', 'Function', 'function',
+    'Test Name', 'name', 'Description', 'description'
+)
+
+
+def csv_basename(raw):
+    """Bare file name from a CSV path cell (handles / and \\ separators)"""
+    return (raw or '').rstrip('/\\').rsplit('/', 1)[-1].rsplit('\\', 1)[-1]
+
+
+def count_lines(path) -> int:
+    """Count lines in a file without decoding it or splitting it into lines"""
+    n = 0
+    last = b'\n'
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                # An unterminated last line still counts
+                return n + (last != b'\n')
+            n += block.count(b'\n')
+            last = block[-1:]
+
+
 def remove_test_cases_from_csv(csv_path, deleted_files=None, removed_functions=None, modified_files=None):
     """
     Remove test cases from CSV for:
@@ -139,7 +284,6 @@ def remove_test_cases_from_csv(csv_path, deleted_files=None, removed_functions=N
     Returns: Path to cleaned CSV, count of removed tests, dict of removal breakdown
     """
     import csv as csv_module
-    import tempfile
     
     if not deleted_files and not removed_functions and not modified_files:
         return csv_path, 0, {}
@@ -148,113 +292,91 @@ def remove_test_cases_from_csv(csv_path, deleted_files=None, removed_functions=N
     removed_functions = removed_functions or {}
     modified_files = modified_files or []
     
-    # Read existing CSV
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv_module.DictReader(f)
-        fieldnames = reader.fieldnames
-        all_rows = list(reader)
-    
-    original_count = len(all_rows)
-    filtered_rows = []
-    
     # Prepare file names for comparison
-    deleted_file_names = [Path(f).name for f in deleted_files] if deleted_files else []
-    modified_file_names = [Path(f).name for f in modified_files] if modified_files else []
+    deleted_file_names = frozenset(os.path.basename(f) for f in deleted_files)
+    modified_file_names = frozenset(os.path.basename(f) for f in modified_files)
+    
+    # One case-insensitive alternation per file; every old matching strategy
+    # (test_func, func(), func_, prefix, suffix) reduced to a substring hit
+    removed_function_patterns = {
+        file_name: re.compile('|'.join(map(re.escape, funcs)), re.IGNORECASE)
+        for file_name, funcs in removed_functions.items()
+        if funcs
+    }
     
     removal_stats = {
         'deleted_files': 0,
         'modified_files': 0,
         'removed_functions': 0
     }
+    removed_count = 0
+    removed_samples = []
     
-    for row in all_rows:
-        # Get file name from various possible column names
-        file_name = (
-            Path(row.get('File', '')).name or
-            Path(row.get('Source File', '')).name or
-            Path(row.get('file', '')).name or
-            Path(row.get('Target File', '')).name or
-            ''
-        )
+    # Stream rows straight from the existing CSV into the filtered temp file
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f, tempfile.NamedTemporaryFile(
+        mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8'
+    ) as temp_csv:
+        # Plain lists rather than a dict per row; kept rows pass through unchanged
+        reader = csv_module.reader(f)
+        writer = csv_module.writer(temp_csv)
+        header = next(reader, [])
+        writer.writerow(header)
+        
+        # Resolve which aliases this CSV actually has once, from the header
+        file_idx = [header.index(col) for col in CSV_FILE_COLUMNS if col in header]
+        target_idx = [header.index(col) for col in CSV_TARGET_COLUMNS if col in header]
         
-        should_remove = False
-        removal_reason = None
+        for row in reader:
+            if not row:
+                continue
+            width = len(row)
+            
+            # Get file name from the first populated file column
+            file_name = next(filter(None, (csv_basename(row[i]) for i in file_idx if i < width)), '')
         
-        # Check if file was deleted
-        if file_name and file_name in deleted_file_names:
-            logger.info(f"🗑️ Removing test for deleted file: {file_name}")
-            should_remove = True
-            removal_reason = 'deleted_file'
-            removal_stats['deleted_files'] += 1
+            should_remove = False
+            removal_reason = None
         
-        # Check if file was modified (regenerate all tests for this file)
-        elif file_name and file_name in modified_file_names:
-            logger.info(f"🔄 Removing test for modified file (will regenerate): {file_name}")
-            should_remove = True
-            removal_reason = 'modified_file'
-            removal_stats['modified_files'] += 1
+            # Check if file was deleted
+            if file_name and file_name in deleted_file_names:
+                should_remove = True
+                removal_reason = 'deleted_file'
+                removal_stats['deleted_files'] += 1
         
-        # Check if function was removed (only if file not already removed)
-        elif not should_remove and removed_functions and file_name in removed_functions:
-            # Get function/target name from test case
-            target = (
-                row.get('Target', '') or
-                row.get('target', '') or
-                row.get('Function', '') or
-                row.get('function', '') or
-                row.get('Test Name', '') or
-                row.get('name', '') or
-                row.get('Description', '') or
-                row.get('description', '') or
-                ''
-            )
+            # Check if file was modified (regenerate all tests for this file)
+            elif file_name and file_name in modified_file_names:
+                should_remove = True
+                removal_reason = 'modified_file'
+                removal_stats['modified_files'] += 1
+        
+            # Check if function was removed (only if file not already removed)
+            elif file_name in removed_function_patterns:
+                # Get function/target name from test case
+                target = next(filter(None, (row[i] for i in target_idx if i < width)), '')
             
-            # Check if this test is for a removed function
-            for removed_func in removed_functions[file_name]:
-                # Enhanced matching patterns
-                target_lower = target.lower()
-                removed_func_lower = removed_func.lower()
-                
-                # Multiple matching strategies
-                match_patterns = [
-                    removed_func in target,  # Exact match
-                    removed_func_lower in target_lower,  # Case-insensitive
-                    f"test_{removed_func_lower}" in target_lower,  # test_function pattern
-                    f"{removed_func_lower}()" in target_lower,  # function() pattern
-                    f"{removed_func_lower}_" in target_lower,  # function_ pattern
-                    target_lower.startswith(removed_func_lower),  # Starts with function name
-                    target_lower.endswith(removed_func_lower),  # Ends with function name
-                ]
-                
-                if any(match_patterns):
-                    logger.info(f"🗑️ Removing test for removed function: {removed_func} in {file_name}")
-                    logger.info(f"   Matched test: {target}")
+                # Check if this test is for a removed function
+                match = removed_function_patterns[file_name].search(target)
+                if match:
                     should_remove = True
                     removal_reason = 'removed_function'
                     removal_stats['removed_functions'] += 1
-                    break
         
-        if not should_remove:
-            filtered_rows.append(row)
-        else:
-            # Debug logging
-            logger.debug(f"Removed test: {file_name} - Reason: {removal_reason}")
-    
-    removed_count = original_count - len(filtered_rows)
+            if not should_remove:
+                writer.writerow(row)
+            else:
+                removed_count += 1
+                # A capped sample instead of one log line per removed row
+                if len(removed_samples) < 20:
+                    removed_samples.append(f"{file_name} ({removal_reason})")
     
     if removed_count == 0:
+        os.unlink(temp_csv.name)
         logger.info("✅ No test cases needed to be removed")
         return csv_path, 0, removal_stats
     
-    # Write filtered CSV to temp file
-    temp_csv = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='', encoding='utf-8')
-    writer = csv_module.DictWriter(temp_csv, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(filtered_rows)
-    temp_csv.close()
-    
     logger.info(f"✅ Removed {removed_count} test cases from CSV")
     logger.info(f"   Breakdown: {removal_stats}")
+    logger.info(f"   Examples: {', '.join(removed_samples)}")
     
     return Path(temp_csv.name), removed_count, removal_stats
 
@@ -290,14 +412,23 @@ def clear_session_context():
     logger.info("🧹 Clearing session context")
     
     st.session_state.chat_history = []
+    clear_upload_dir()
     st.session_state.uploaded_files = {}
-    st.session_state.previous_code = {}
+    st.session_state.upload_keys = set()
+    st.session_state.previous_baselines = {}
+    st.session_state.previous_hashes = {}
+    st.session_state.parsed_uploads = {}
     st.session_state.generated_tests = {}
+    st.session_state.has_test_results = False
     st.session_state.last_repo_info = {}
     st.session_state.pending_git = None
     st.session_state.current_repo_path = None
     st.session_state.current_repo_csv = {}
     st.session_state.current_chat_file = None
+    st.session_state.chat_saved_count = 0
+    
+    if "response_cache" in st.session_state:
+        st.session_state.response_cache.clear()
     
     try:
         if hasattr(st.session_state, "rag_system"):
@@ -310,61 +441,176 @@ def clear_session_context():
     logger.info("✅ Session context cleared")
 
 
+def append_chat_message(message: dict):
+    """Append a message to the session chat history, keeping it bounded"""
+    st.session_state.chat_history.append(message)
+    trim_chat_history()
+
+
+def trim_chat_history():
+    """
+    Drop messages beyond config.CHAT_HISTORY_LIMIT from the session
+
+    The saved chat file keeps the full conversation, so dropped messages are
+    saved first if they have not been yet.
+    """
+    history = st.session_state.chat_history
+    overflow = len(history) - config.CHAT_HISTORY_LIMIT
+    if overflow <= 0:
+        return
+    
+    # Queued like other saves so appends to the file stay in order
+    if st.session_state.chat_saved_count < overflow:
+        save_chat_history(st.session_state.get('selected_test_types'), background=True)
+    
+    del history[:overflow]
+    st.session_state.chat_saved_count = max(0, st.session_state.chat_saved_count - overflow)
+    logger.info(f"📤 Dropped {overflow} old chat messages from the session (kept in the saved chat)")
+
+
 def has_context() -> bool:
     """Check if there's any context available"""
     if st.session_state.uploaded_files:
         return True
     if st.session_state.current_repo_path:
         return True
-    for message in st.session_state.chat_history:
-        if message.get("role") == "assistant" and "test_results" in message:
-            return True
+    if st.session_state.has_test_results:
+        return True
     if st.session_state.rag_system.code_documents:
         return True
     return False
 
 
-def auto_save_chat():
-    """Auto-save chat after significant interactions"""
+def auto_save_chat() -> bool:
+    """
+    Auto-save chat after significant interactions (written in the background).
+
+    The background writer batches bursts of saves into one write per file.
+
+    Returns:
+        True if new messages were queued for saving
+    """
     if st.session_state.chat_history and len(st.session_state.chat_history) >= 2:
+        saved_before = st.session_state.chat_saved_count
         selected_types = st.session_state.get('selected_test_types', ['Unit Test', 'Functional Test'])
-        save_chat_history(selected_types)
+        save_chat_history(selected_types, background=True)
+        return st.session_state.chat_saved_count != saved_before
+    return False
 
 
-def save_chat_history(selected_test_types: list = None):
-    """Save chat history to file with smart naming"""
-    if not st.session_state.chat_history:
+def save_chat_history(selected_test_types: list = None, background: bool = False):
+    """
+    Save chat history with smart naming.
+
+    Chats are stored as JSONL: the first save creates the file and later saves
+    only append the messages added since, so each save is O(new messages).
+    """
+    history = st.session_state.chat_history
+    if not history:
         return None
     
-    history_dir = Path("chat_history")
-    history_dir.mkdir(exist_ok=True)
-    
-    # Generate smart name based on content and selected test types
-    chat_name = generate_smart_chat_name(st.session_state.chat_history, selected_test_types)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = history_dir / f"{chat_name}_{timestamp}.json"
-    
-    with open(filename, 'w') as f:
-        json.dump(st.session_state.chat_history, f, indent=2)
-    
-    # Track current chat file for deletion
-    st.session_state.current_chat_file = str(filename)
+    filename = st.session_state.current_chat_file
+    if filename is None:
+        history_dir = Path("chat_history")
+        history_dir.mkdir(exist_ok=True)
+        
+        # Generate smart name based on content and selected test types
+        chat_name = generate_smart_chat_name(history, selected_test_types)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = str(history_dir / f"{chat_name}_{timestamp}.jsonl")
+        
+        # Track current chat file for appends and deletion
+        st.session_state.current_chat_file = filename
+        logger.info(f"💾 Chat saved as: {chat_name}")
     
-    logger.info(f"💾 Chat saved as: {chat_name}")
+    # Messages are append-only, so a slice of the unsaved tail is enough
+    new_messages = history[st.session_state.chat_saved_count:]
+    if new_messages:
+        st.session_state.chat_saved_count = len(history)
+        if background:
+            get_chat_save_queue().put((filename, new_messages))
+        else:
+            append_chat_file(filename, new_messages)
     
-    return filename
+    return Path(filename)
+
+
+def append_chat_file(filename, messages):
+    """Append messages to a JSONL chat file, one compact JSON object per line"""
+    with open(filename, 'ab', buffering=8192) as f:
+        f.write(b"".join(map(dump_chat_line, messages)))
+
+
+def chat_save_worker(save_queue):
+    """Append queued messages, batching a burst into one write per file"""
+    while True:
+        filename, messages = save_queue.get()
+        pending = {filename: list(messages)}
+        batched = 1
+        while True:
+            try:
+                filename, messages = save_queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.setdefault(filename, []).extend(messages)
+            batched += 1
+        
+        for filename, messages in pending.items():
+            try:
+                append_chat_file(filename, messages)
+            except Exception as e:
+                logger.error(f"Error saving chat {filename}: {e}")
+        
+        for _ in range(batched):
+            save_queue.task_done()
+
+
+@st.cache_resource
+def get_chat_save_queue():
+    """One background writer per process; the script thread only enqueues snapshots"""
+    save_queue = queue.Queue()
+    threading.Thread(target=chat_save_worker, args=(save_queue,), name="chat-saver", daemon=True).start()
+    # Flush queued appends before the interpreter exits
+    atexit.register(save_queue.join)
+    return save_queue
 
 
 def load_chat_history(filename):
-    """Load chat history from file"""
-    with open(filename, 'r') as f:
-        return json.load(f)
+    """Load chat history from a JSONL file (or a legacy single-document .json file)"""
+    return read_chat_file(str(filename), os.stat(filename).st_mtime_ns)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def read_chat_file(filename: str, mtime_ns: int):
+    """
+    Parse a saved chat once per (path, mtime).
+
+    Appends bump the mtime, so a cached parse is never stale; st.cache_data
+    hands back a copy, so callers may mutate the result.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(filename, 'rb') as f:
+        if str(filename).endswith('.json'):
+            return loads(f.read())
+        return [loads(line) for line in f if line.strip()]
+
+
+def dump_chat_line(message) -> bytes:
+    """Serialise one chat message as a compact JSONL line (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(message, separators=(',', ':')).encode("utf-8") + b"\n"
 
 
 def delete_chat_file(filepath):
     """Delete a chat file from disk"""
     try:
         Path(filepath).unlink()
+        list_chat_files.clear()
+        if str(filepath) == st.session_state.current_chat_file:
+            # Later saves start a fresh file with the whole conversation
+            st.session_state.current_chat_file = None
+            st.session_state.chat_saved_count = 0
         logger.info(f"🗑️ Deleted chat file: {filepath}")
         return True
     except Exception as e:
@@ -372,52 +618,373 @@ def delete_chat_file(filepath):
         return False
 
 
+def chat_display_name(chat_file: Path) -> str:
+    """Readable sidebar label for a saved chat file"""
+    name = chat_file.stem
+    # Remove timestamp if present
+    parts = name.rsplit('_', 2)  # Split from right to preserve underscores in name
+    display_name = parts[0] if len(parts) >= 3 else name
+    
+    # Limit display name length
+    if len(display_name) > 35:
+        display_name = display_name[:35] + "..."
+    return display_name
+
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=30)
+def list_chat_files(dir_mtime_ns: int, limit: int = 50) -> dict:
+    """
+    Most recent saved chats as {path: display name}.
+
+    The directory mtime is the cache key: creating or deleting a chat bumps it,
+    so the listing is only re-globbed when it can have changed. Deletes also
+    clear the cache explicitly and entries expire after 30s, in case the
+    filesystem's mtime granularity hides a change.
+    """
+    history_dir = Path("chat_history")
+    chat_files = sorted([*history_dir.glob("*.jsonl"), *history_dir.glob("*.json")], reverse=True)[:limit]
+    return {str(chat_file): chat_display_name(chat_file) for chat_file in chat_files}
+
+
+# ---- Helper: uploaded files -----------------------------------------------------
+def upload_path(name: str) -> Path:
+    """Sanitized spool path for an upload in the session upload directory"""
+    safe_name = Path(st.session_state.security_manager.sanitize_filename(name))
+    # Names that sanitize alike ("a b.py", "a_b.py") must not share a spool file
+    tag = hashlib.blake2b(name.encode("utf-8"), digest_size=4).hexdigest()
+    return Path(st.session_state.upload_dir) / f"{safe_name.stem}_{tag}{safe_name.suffix}"
+
+
+def baseline_path(name: str) -> Path:
+    """Path of the copy an upload's changes are diffed against"""
+    spool = upload_path(name)
+    return spool.with_name(f"baseline_{spool.name}")
+
+
+def clear_upload_dir():
+    """Delete every spooled upload and diff baseline in the session upload directory"""
+    for entry in Path(st.session_state.upload_dir).iterdir():
+        try:
+            entry.unlink()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not remove {entry}: {e}")
+
+
+def spool_uploaded_file(path: Path, data: bytes) -> dict:
+    """Write an upload's bytes to its spool path and return its metadata"""
+    with open(path, "wb") as out:
+        out.write(data)
+    
+    # Line count straight from the bytes, so the text is never decoded here
+    return {"path": str(path), "size": len(data), "lines": data.count(b"\n") + 1}
+
+
+def prepare_upload(uploaded_file, path: Path, baseline: str = None, prev_digest: bytes = None):
+    """
+    Spool, hash and diff one upload.
+
+    Runs on the upload pool, so it makes no Streamlit calls; the previous
+    version's baseline path is passed in and session state is updated by the
+    caller. The baseline is only read when the digests differ.
+
+    Returns:
+        (file info, changes)
+    """
+    # getvalue() shares the upload's buffer rather than copying it
+    data = uploaded_file.getvalue()
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    info = spool_uploaded_file(path, data)
+    info["digest"] = digest
+    
+    prev_code = None
+    if prev_digest is not None and prev_digest != digest:
+        prev_code = Path(baseline).read_bytes()
+    return info, detect_code_changes(data, digest, prev_code, prev_digest)
+
+
+def read_uploaded_file(name: str, limit: int = -1) -> str:
+    """Read (the first `limit` bytes of) a spooled upload as text"""
+    from code_parser import decode_source
+
+    info = st.session_state.uploaded_files[name]
+    with open(info["path"], "rb") as f:
+        return decode_source(f.read(limit))
+
+
+PARSE_CACHE_SIZE = 512
+
+# Below this many cache misses, parsing inline beats the IPC to the process pool
+PROCESS_PARSE_MIN_FILES = 4
+
+# Minimum progress-bar advance (fraction) between redraws while parsing
+PROGRESS_STEP = 0.05
+
+
+def parse_files_parallel(parser, paths: dict, progress=None) -> dict:
+    """
+    Read and parse files concurrently.
+
+    Files are read, hashed and looked up in the parse cache on threads. Cache
+    misses are CPU-bound (and hold the GIL), so they go to the shared process
+    pool, or are parsed inline when there are only a few.
+
+    Args:
+        parser: CodeParser instance used for inline parsing
+        paths: Mapping of display name -> file path
+        progress: Optional st.progress element updated as files finish
+
+    Returns:
+        Mapping of display name -> parsed data, in input order; cached results
+        are shared, so callers must not mutate them
+    """
+    if not paths:
+        return {}
+
+    from code_parser import PARSER_VERSION, decode_source, intern_names
+
+    entries, lock = get_parse_cache()
+    # Persisted as JSON (never pickle), so a writable cache directory cannot
+    # inject code
+    if orjson is not None:
+        loads, dumps = orjson.loads, orjson.dumps
+    else:
+        loads = json.loads
+
+        def dumps(obj):
+            return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    total = len(paths)
+    done = 0
+    shown = 0.0
+
+    def _advance():
+        # Each update is a websocket message, so only redraw in 5% steps
+        nonlocal done, shown
+        done += 1
+        frac = done / total
+        if progress is not None and (frac - shown >= PROGRESS_STEP or done == total):
+            progress.progress(frac)
+            shown = frac
+
+    def _disk_path(name, data):
+        # Language detection depends on the name, so it is part of the key
+        h = hashlib.sha256(f"{PARSER_VERSION}\0{name}\0".encode() + data).hexdigest()
+        return config.PARSE_CACHE_DIR / h[:2] / f"{h}.json"
+
+    def _remember(key, parsed):
+        # Results loaded from disk or returned by a worker process lose interning
+        intern_names(parsed)
+        with lock:
+            entries[key] = parsed
+            while len(entries) > PARSE_CACHE_SIZE:
+                entries.popitem(last=False)
+
+    def _read(name, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        key = (hashlib.blake2b(data, digest_size=16).digest(), name)
+        with lock:
+            parsed = entries.get(key)
+            if parsed is not None:
+                entries.move_to_end(key)
+                return key, data, parsed
+
+        # Fall back to results persisted by earlier runs
+        cache_path = _disk_path(name, data)
+        try:
+            with open(cache_path, "rb") as f:
+                parsed = loads(f.read())
+            # Pruning keeps the most recently used entries
+            os.utime(cache_path)
+        except FileNotFoundError:
+            return key, data, None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry for {name}: {e}")
+            return key, data, None
+        _remember(key, parsed)
+        return key, data, parsed
+
+    def _store(name, key, data, parsed):
+        results[name] = parsed
+        _remember(key, parsed)
+
+        cache_path = _disk_path(name, data)
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps(parsed))
+            os.replace(tmp_path, cache_path)
+            stored.append(cache_path)
+        except Exception as e:
+            logger.warning(f"Could not persist parse result for {name}: {e}")
+
+    # Reads dominate for small files, so oversubscribe the CPUs (capped)
+    workers = min(32, (os.cpu_count() or 1) * 4, total)
+
+    results = {}
+    misses = {}
+    stored = []
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(_read, name, path): name for name, path in paths.items()}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                key, data, parsed = fut.result()
+            except Exception as e:
+                logger.warning(f"Read error {name}: {e}")
+                _advance()
+                continue
+            if parsed is not None:
+                results[name] = parsed
+                _advance()
+            else:
+                misses[name] = (key, data)
+
+    pending = {}
+    if len(misses) >= PROCESS_PARSE_MIN_FILES:
+        from code_parser import parse_code_bytes
+        try:
+            pool = get_parse_pool()
+            pending = {pool.submit(parse_code_bytes, data, name): name for name, (key, data) in misses.items()}
+        except RuntimeError:
+            # Broken or shut-down pool: rebuild it next time
+            get_parse_pool.clear()
+            logger.warning("⚠️ Parse process pool unavailable; parsing inline")
+
+    for fut in as_completed(pending):
+        name = pending[fut]
+        try:
+            _store(name, *misses[name], fut.result())
+            del misses[name]
+            _advance()
+        except BrokenProcessPool:
+            # Leave it in misses for the inline pass below
+            get_parse_pool.clear()
+        except Exception as e:
+            logger.warning(f"Parse error {name}: {e}")
+            del misses[name]
+            _advance()
+
+    for name, (key, data) in misses.items():
+        try:
+            _store(name, key, data, parser.parse_code(decode_source(data), name))
+        except Exception as e:
+            logger.warning(f"Parse error {name}: {e}")
+        _advance()
+
+    if stored:
+        get_upload_pool().submit(prune_parse_cache_dir, config.PARSE_CACHE_MAX_FILES)
+
+    return {name: results[name] for name in paths if name in results}
+
+
+def prune_parse_cache_dir(max_files: int) -> None:
+    """
+    Delete all but the `max_files` most recently used persisted parse results
+
+    Disk cache hits touch their entry, so the modification time is the last
+    use. Pickled entries written by older versions are always removed.
+    """
+    entries = []
+    try:
+        for shard in os.scandir(config.PARSE_CACHE_DIR):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    if entry.name.endswith(".json"):
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    elif entry.name.endswith(".pkl"):
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    # Removed concurrently by another session's prune
+                    pass
+    except OSError as e:
+        logger.warning(f"Could not scan parse cache: {e}")
+        return
+
+    if len(entries) <= max_files:
+        return
+
+    entries.sort()
+    for _, path in entries[:len(entries) - max_files]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    logger.info(f"🧹 Pruned {len(entries) - max_files} parse cache entries")
+
+
 # ---- Helper: change detection ---------------------------------------------------
-def detect_code_changes(file_name, current_code):
-    if file_name in st.session_state.previous_code:
-        prev = st.session_state.previous_code[file_name]
-        if prev != current_code:
-            prev_lines = set(prev.split("\n"))
-            cur_lines = set(current_code.split("\n"))
-            added = cur_lines - prev_lines
-            removed = prev_lines - cur_lines
-            return {
-                "changed": True,
-                "added_lines": len(added),
-                "removed_lines": len(removed),
-                "added": list(added)[:5],
-                "removed": list(removed)[:5],
-            }
-    return {"changed": False}
+def detect_code_changes(current_code: bytes, digest: bytes, prev_code: bytes = None, prev_digest: bytes = None):
+    """
+    Line-diff an upload against its previous version.
+
+    Unchanged content is rejected by comparing BLAKE2b digests; only changed
+    files are decoded and diffed, in a single pass over the unified diff.
+    """
+    if prev_digest is None or prev_digest == digest:
+        return {"changed": False}
+
+    from code_parser import decode_source
+
+    diff = difflib.unified_diff(
+        decode_source(prev_code).splitlines(), decode_source(current_code).splitlines(),
+        lineterm="", n=0,
+    )
+
+    added_lines = removed_lines = 0
+    added, removed = [], []
+    # Skip the ---/+++ header; hunk headers start with "@"
+    for line in itertools.islice(diff, 2, None):
+        tag = line[:1]
+        if tag == "+":
+            added_lines += 1
+            if len(added) < 5:
+                added.append(line[1:])
+        elif tag == "-":
+            removed_lines += 1
+            if len(removed) < 5:
+                removed.append(line[1:])
+
+    return {
+        "changed": True,
+        "added_lines": added_lines,
+        "removed_lines": removed_lines,
+        "added": added,
+        "removed": removed,
+    }
 
 
 # ---- Helper: test display -------------------------------------------------------
+def _md_cell(text) -> str:
+    """Make text safe for a single markdown table cell"""
+    return str(text).replace("|", "\\|").replace("\n", " ")
+
+
 def display_professional_test(test, index):
+    """Render one professional test as a single markdown element"""
     test_id = test.get("test_case_id", test.get("name", f"TC-{index:03d}"))
-    with st.container():
-        st.markdown(f"### {test_id}")
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.markdown(f"**Description:** {test.get('description', 'N/A')}")
-        with col2:
-            pri = "High" if "Functional" in test.get("type", "") else "Medium"
-            st.markdown(f"**Priority:** {pri}")
-        st.markdown("**Target:** " + test.get("target", "N/A"))
-        if test.get("file"):
-            st.markdown("**File:** " + test.get("file", "N/A"))
-
-        st.markdown("#### Steps")
-        steps = test.get("steps", "N/A")
-        if steps != "N/A":
-            for s in steps.split("\n"):
-                if s.strip():
-                    st.markdown(f"- {s.strip()}")
-        else:
-            st.markdown("_No steps_")
+    file = test.get("file")
+    steps = test.get("steps", "N/A")
+    pri = "High" if "Functional" in test.get("type", "") else "Medium"
 
-        st.markdown("#### Expected Result")
-        st.info(test.get("expected_result", "N/A"))
-        st.divider()
+    if steps != "N/A":
+        steps_md = "\n".join(f"- {s.strip()}" for s in steps.split("\n") if s.strip())
+    else:
+        steps_md = "_No steps_"
+    file_md = f"  \n**File:** {file}" if file else ""
+    expected = str(test.get("expected_result", "N/A")).replace("\n", "\n> ")
+
+    st.markdown(
+        f"### {test_id}\n\n"
+        f"| Description | Priority |\n|---|---|\n"
+        f"| {_md_cell(test.get('description', 'N/A'))} | {pri} |\n\n"
+        f"**Target:** {test.get('target', 'N/A')}{file_md}\n\n"
+        f"#### Steps\n{steps_md}\n\n"
+        f"#### Expected Result\n> {expected}\n\n"
+        f"---"
+    )
 
 
 def display_code_test(test, index):
@@ -427,12 +994,75 @@ def display_code_test(test, index):
     file = test.get("file", "N/A")
     chunk = test.get("chunk_name", "N/A")
     st.markdown(f"**Test {index}:** {name}")
-    st.caption(f"{file} | Chunk: {chunk}")
-    if desc:
-        st.caption(desc)
+    st.caption(f"{file} | Chunk: {chunk}" + (f"  \n{desc}" if desc else ""))
     st.code(code, language="python")
 
 
+def display_generation_failures(tests):
+    """Warn about files whose LLM requests timed out or failed (placeholder tests were used)"""
+    failed = sorted({
+        t.get("file", "N/A")
+        for lst in tests.values()
+        for t in lst
+        if t.get("error")
+    })
+    if failed:
+        st.warning(
+            f"⏱️ LLM request timed out or failed for **{len(failed)}** file(s); "
+            f"placeholder tests were used: {', '.join(failed)}"
+        )
+
+
+def hash_test_results(tests) -> str:
+    """Content hash of generated tests, used as the download cache key"""
+    return hashlib.blake2b(repr(tests).encode(), digest_size=16).hexdigest()
+
+
+def download_bytes(path) -> bytes:
+    """Bytes for a download button, read once per file version"""
+    stat = os.stat(path)
+    return read_file_bytes(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def read_file_bytes(path: str, mtime_ns: int, size: int) -> bytes:
+    """Cached file read; mtime and size in the key invalidate it when the file changes"""
+    return Path(path).read_bytes()
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def build_test_downloads(results_hash: str, _tests):
+    """Build CSV and report once per distinct test suite and return their bytes"""
+    csv_h = get_csv_handler()
+    # Independent writers over the same tests; overlap their file I/O
+    report_future = get_upload_pool().submit(csv_h.generate_professional_test_report, _tests)
+    csv_file = csv_h.generate_csv(_tests)
+    report_file = report_future.result()
+    return csv_file.read_bytes(), report_file.read_bytes()
+
+
+# Tests rendered inline per type. Results are shown on the generating run only
+# (a page widget would rerun the script and drop them), so the rest of the
+# suite is left to the CSV download instead of being paged.
+TEST_DISPLAY_LIMIT = 5
+
+
+def display_test_results(tests, test_types, label="", expanded=True, limit=TEST_DISPLAY_LIMIT):
+    """Render up to `limit` tests for each selected type that has results"""
+    for ttype in test_types:
+        lst = tests.get(ttype)
+        if not lst:
+            continue
+        with st.expander(f"{ttype}s ({len(lst)}{label})", expanded=expanded):
+            for i, t in enumerate(lst[:limit], 1):
+                if t.get("format") == "professional":
+                    display_professional_test(t, i)
+                else:
+                    display_code_test(t, i)
+            if len(lst) > limit:
+                st.info(f"... and {len(lst) - limit} more (download CSV)")
+
+
 # ---- Sidebar --------------------------------------------------------
 def display_sidebar():
     with st.sidebar:
@@ -463,42 +1093,45 @@ def display_sidebar():
         
         st.divider()
         
-        # Display saved chats with individual delete buttons
+        # Saved chats: one selectbox plus load/delete actions
         history_dir = Path("chat_history")
         if history_dir.exists():
-            chat_files = sorted(history_dir.glob("*.json"), reverse=True)
-            if chat_files:
-                st.write("**Recent Chats:**")
-                for chat_file in chat_files[:10]:
-                    # Extract readable name from filename
-                    name = chat_file.stem
-                    # Remove timestamp if present
-                    parts = name.rsplit('_', 2)  # Split from right to preserve underscores in name
-                    if len(parts) >= 3:
-                        display_name = parts[0]  # Everything before the timestamp
-                    else:
-                        display_name = name
-                    
-                    # Limit display name length
-                    if len(display_name) > 35:
-                        display_name = display_name[:35] + "..."
-                    
-                    # Create columns for chat button and delete button
-                    col_chat, col_del = st.columns([4, 1])
-                    
-                    with col_chat:
-                        if st.button(f"📄 {display_name}", key=f"load_{chat_file.name}", use_container_width=True):
-                            st.session_state.chat_history = load_chat_history(chat_file)
-                            st.session_state.current_chat_file = str(chat_file)
+            titles = list_chat_files(history_dir.stat().st_mtime_ns)
+            if titles:
+                selected_chat = st.selectbox(
+                    "**Recent Chats:**",
+                    options=list(titles),
+                    format_func=titles.get,
+                    key="selected_chat_file",
+                )
+                
+                col_load, col_del = st.columns(2)
+                
+                with col_load:
+                    if st.button("📄 Load", use_container_width=True):
+                        st.session_state.chat_history = load_chat_history(selected_chat)
+                        if selected_chat.endswith('.jsonl'):
+                            st.session_state.current_chat_file = selected_chat
+                            st.session_state.chat_saved_count = len(st.session_state.chat_history)
+                        else:
+                            # Legacy .json chats are re-saved as a new JSONL file
+                            st.session_state.current_chat_file = None
+                            st.session_state.chat_saved_count = 0
+                        # Scan once on load instead of on every has_context() call
+                        st.session_state.has_test_results = any(
+                            msg.get("role") == "assistant" and "test_results" in msg
+                            for msg in st.session_state.chat_history
+                        )
+                        trim_chat_history()
+                        st.rerun()
+                
+                with col_del:
+                    if st.button("🗑️ Delete", use_container_width=True, help="Delete this chat"):
+                        if delete_chat_file(selected_chat):
+                            st.success("Deleted!")
                             st.rerun()
-                    
-                    with col_del:
-                        if st.button("🗑️", key=f"del_{chat_file.name}", help="Delete this chat"):
-                            if delete_chat_file(chat_file):
-                                st.success("Deleted!")
-                                st.rerun()
-                            else:
-                                st.error("Failed!")
+                        else:
+                            st.error("Failed!")
         
         return test_types
 
@@ -527,35 +1160,56 @@ def display_chat():
     # Process uploaded files
     if uploaded_files:
         names = []
+        # Unchanged uploads are only re-rendered, not re-spooled or re-diffed;
+        # new ones are prepared concurrently and rendered below in upload order
+        pool = get_upload_pool()
+        pending = {}
         for uf in uploaded_files:
+            upload_key = (uf.name, uf.size, uf.file_id)
+            if upload_key not in st.session_state.upload_keys and uf.size <= config.MAX_FILE_SIZE:
+                pending[upload_key] = pool.submit(
+                    prepare_upload, uf, upload_path(uf.name),
+                    st.session_state.previous_baselines.get(uf.name),
+                    st.session_state.previous_hashes.get(uf.name),
+                )
+
+        for uf in uploaded_files:
+            # Rejected before any bytes are copied, spooled or decoded
+            if uf.size > config.MAX_FILE_SIZE:
+                st.error(f"{uf.name} is too large ({uf.size:,} bytes; limit {config.MAX_FILE_SIZE:,})")
+                continue
+
+            upload_key = (uf.name, uf.size, uf.file_id)
             try:
-                txt = uf.read().decode("utf-8")
-                changes = detect_code_changes(uf.name, txt)
-                st.session_state.uploaded_files[uf.name] = txt
-                st.session_state.previous_code[uf.name] = txt
-
-                if changes["changed"]:
-                    st.warning(f"Changes in **{uf.name}**")
-                    with st.expander("View diff"):
-                        st.write(f"+{changes['added_lines']}  -{changes['removed_lines']} lines")
-                        if changes["added"]:
-                            st.write("**Added:** " + ", ".join(changes["added"]))
-                        if changes["removed"]:
-                            st.write("**Removed:** " + ", ".join(changes["removed"]))
-
-                lines = len(txt.splitlines())
+                future = pending.get(upload_key)
+                if future is not None:
+                    # The diff baseline only moves when tests are generated
+                    info, changes = future.result()
+                    st.session_state.uploaded_files[uf.name] = info
+
+                    if changes["changed"]:
+                        st.warning(f"Changes in **{uf.name}**")
+                        with st.expander("View diff"):
+                            st.write(f"+{changes['added_lines']}  -{changes['removed_lines']} lines")
+                            if changes["added"]:
+                                st.write("**Added:** " + ", ".join(changes["added"]))
+                            if changes["removed"]:
+                                st.write("**Removed:** " + ", ".join(changes["removed"]))
+
+                    st.session_state.upload_keys.add(upload_key)
+                    names.append(f"`{uf.name}`")
+
+                lines = st.session_state.uploaded_files[uf.name]["lines"]
                 with st.expander(f"{uf.name} ({lines} lines)"):
-                    st.code(txt[:1000], language="python")
-                    if len(txt) > 1000:
-                        st.caption(f"... ({len(txt)} chars total)")
-
-                names.append(f"`{uf.name}`")
+                    st.code(read_uploaded_file(uf.name, 1000), language="python")
+                    if uf.size > 1000:
+                        st.caption(f"... ({uf.size:,} bytes total)")
             except Exception as e:
                 st.error(f"Error reading {uf.name}: {e}")
 
         if names:
             msg = f"Uploaded: {', '.join(names)}"
-            st.session_state.chat_history.append(
+            append_chat_message(
                 {"role": "user", "content": msg, "timestamp": datetime.now().isoformat()}
             )
             with st.chat_message("user"):
@@ -564,15 +1218,14 @@ def display_chat():
     # Process text input
     if user_input:
         sanitized = st.session_state.security_manager.sanitize_input(user_input)
-        st.session_state.chat_history.append(
+        append_chat_message(
             {"role": "user", "content": sanitized, "timestamp": datetime.now().isoformat()}
         )
         with st.chat_message("user"):
             st.markdown(sanitized)
 
         # Git URL detection
-        git_pat = re.compile(r"(https?://|git@)[\w\.\-@:/~]+?\.git", re.IGNORECASE)
-        m = git_pat.search(sanitized)
+        m = _GIT_URL_RE.search(sanitized)
         if m:
             url = m.group(0).strip()
             
@@ -583,14 +1236,14 @@ def display_chat():
             clear_session_context()
             
             # Restore the Git URL message so it's the first message in the new chat
-            st.session_state.chat_history.append(git_url_message)
+            append_chat_message(git_url_message)
             
             st.session_state.pending_git = {"url": url, "stage": "ask_branch"}
             bot = (
                 f"Found repository: **{url}**\n"
                 "Please tell me the **branch** (default: `main`):"
             )
-            st.session_state.chat_history.append(
+            append_chat_message(
                 {"role": "assistant", "content": bot, "timestamp": datetime.now().isoformat()}
             )
             with st.chat_message("assistant"):
@@ -598,22 +1251,48 @@ def display_chat():
             return
 
         # Generate from uploaded files
-        if "generate" in sanitized.lower() and st.session_state.uploaded_files:
+        if st.session_state.uploaded_files and _GENERATE_RE.search(sanitized):
             with st.chat_message("assistant"):
                 with st.spinner("Generating tests from uploaded files..."):
                     start = time.time()
-                    parser = CodeParser()
-                    parsed = {
-                        n: parser.parse_code(c, n)
-                        for n, c in st.session_state.uploaded_files.items()
+                    # Only uploads whose content changed since the last generate
+                    # are re-parsed and re-indexed
+                    uploads = st.session_state.uploaded_files
+                    parsed_uploads = st.session_state.parsed_uploads
+                    stale = {
+                        n: info["path"] for n, info in uploads.items()
+                        if parsed_uploads.get(n, (None,))[0] != info["digest"]
                     }
-                    st.session_state.rag_system.add_code_documents(parsed)
-
-                    gen = TestGenerator(st.session_state.llm_handler, st.session_state.rag_system)
-                    tests = gen.generate_tests(parsed, test_types, module_level=True)
+                    if stale:
+                        parse_prog = st.progress(0.0)
+                        fresh = parse_files_parallel(get_code_parser(), stale, parse_prog)
+                        parse_prog.empty()
+                        for n, data in fresh.items():
+                            parsed_uploads[n] = (uploads[n]["digest"], data)
+                        # Saved to disk together with the test cases below
+                        st.session_state.rag_system.add_code_documents(fresh, persist=False)
+                    parsed = {n: parsed_uploads[n][1] for n in uploads if n in parsed_uploads}
+
+                    from test_generator import TestGenerator
+                    gen = TestGenerator(get_llm_handler(), st.session_state.rag_system)
+                    gen_prog = st.progress(0.0)
+                    tests = gen.generate_tests(
+                        parsed, test_types, module_level=True, progress_callback=gen_prog.progress
+                    )
+                    gen_prog.empty()
+                    display_generation_failures(tests)
                     st.session_state.generated_tests = tests
+                    st.session_state.has_test_results = True
                     st.session_state.rag_system.add_test_cases(tests, session_id="current")
 
+                    # Uploads just generated from become the baseline for change detection
+                    for n, info in uploads.items():
+                        if st.session_state.previous_hashes.get(n) != info["digest"]:
+                            baseline = baseline_path(n)
+                            shutil.copyfile(info["path"], baseline)
+                            st.session_state.previous_baselines[n] = str(baseline)
+                            st.session_state.previous_hashes[n] = info["digest"]
+
                     # Count tests properly
                     unit_count = len(tests.get("Unit Test", []))
                     functional_count = len(tests.get("Functional Test", []))
@@ -629,40 +1308,31 @@ def display_chat():
                     with c3: st.metric("Functional", functional_count)
 
                     # Download buttons
-                    csv_h = CSVHandler()
-                    csv_file = csv_h.generate_csv(tests)
-                    report_file = csv_h.generate_professional_test_report(tests)
+                    st.session_state.generated_tests_hash = hash_test_results(tests)
+                    csv_bytes, report_bytes = build_test_downloads(
+                        st.session_state.generated_tests_hash, tests
+                    )
+                    # One timestamp so the paired downloads share a name suffix
+                    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
                     d1, d2 = st.columns(2)
                     with d1:
-                        with open(csv_file, "rb") as f:
-                            st.download_button(
-                                "📥 Download CSV", data=f,
-                                file_name=f"tests_{datetime.now():%Y%m%d_%H%M%S}.csv",
-                                mime="text/csv",
-                            )
+                        st.download_button(
+                            "📥 Download CSV", data=csv_bytes,
+                            file_name=f"tests_{ts}.csv",
+                            mime="text/csv",
+                        )
                     with d2:
-                        with open(report_file, "rb") as f:
-                            st.download_button(
-                                "📥 Download Report", data=f,
-                                file_name=f"report_{datetime.now():%Y%m%d_%H%M%S}.txt",
-                                mime="text/plain",
-                            )
+                        st.download_button(
+                            "📥 Download Report", data=report_bytes,
+                            file_name=f"report_{ts}.txt",
+                            mime="text/plain",
+                        )
 
                     # Show tests
-                    for ttype in test_types:
-                        lst = tests.get(ttype, [])
-                        if lst:
-                            with st.expander(f"{ttype}s ({len(lst)})", expanded=True):
-                                for i, t in enumerate(lst[:10], 1):
-                                    if t.get("format") == "professional":
-                                        display_professional_test(t, i)
-                                    else:
-                                        display_code_test(t, i)
-                                if len(lst) > 10:
-                                    st.info(f"... and {len(lst)-10} more (download CSV)")
-
-                    auto_save_chat()
-                    st.caption("💾 Chat auto-saved")
+                    display_test_results(tests, test_types)
+
+                    if auto_save_chat():
+                        st.caption("💾 Chat auto-saved")
 
             return
 
@@ -675,7 +1345,7 @@ def display_chat():
                 pend["stage"] = "processing"
 
                 bot = f"Understood. The branch `{branch}` has been selected. Will clone and generate test cases."
-                st.session_state.chat_history.append(
+                append_chat_message(
                     {"role": "assistant", "content": bot, "timestamp": datetime.now().isoformat()}
                 )
                 with st.chat_message("assistant"):
@@ -686,13 +1356,21 @@ def display_chat():
             with st.chat_message("assistant"):
                 with st.spinner("Thinking..."):
                     ctx = st.session_state.rag_system.get_relevant_context(sanitized)
-                    reply = st.session_state.llm_handler.generate_chat_response(
-                        sanitized, ctx, st.session_state.chat_history
+                    reply = st.session_state.response_cache.lookup(sanitized, ctx)
+                if reply is None:
+                    # Render tokens as they arrive; write_stream returns the full text
+                    reply = st.write_stream(
+                        get_llm_handler().stream_chat_response(
+                            sanitized, ctx, st.session_state.chat_history
+                        )
                     )
+                    st.session_state.response_cache.store(sanitized, ctx, reply)
+                else:
+                    st.caption("⚡ cached")
                     st.markdown(reply)
-                    st.session_state.chat_history.append(
-                        {"role": "assistant", "content": reply, "timestamp": datetime.now().isoformat()}
-                    )
+                append_chat_message(
+                    {"role": "assistant", "content": reply, "timestamp": datetime.now().isoformat()}
+                )
 
     # Pending Git flow processing
     if st.session_state.pending_git and user_input:
@@ -701,7 +1379,7 @@ def display_chat():
 
             with st.spinner("Cloning & analysing repository…"):
                 try:
-                    gh = GitHandler()
+                    gh = get_git_handler()
                     repo_path, raw_change_info = gh.clone_or_pull_repository(
                         pend["url"], pend["branch"], depth=1
                     )
@@ -714,7 +1392,7 @@ def display_chat():
                         st.info("No new changes in the repository. No new test cases generated.")
                         prev_csv = gh.get_previous_test_file(pend["url"])
                         if prev_csv:
-                            csv_h = CSVHandler()
+                            csv_h = get_csv_handler()
                             report = csv_h.generate_no_changes_report(
                                 prev_csv,
                                 gh._sanitize_repo_name(pend["url"]),
@@ -723,20 +1401,18 @@ def display_chat():
                             st.success("No code changes – using previous test suite")
                             d1, d2 = st.columns(2)
                             with d1:
-                                with open(prev_csv, "rb") as f:
-                                    st.download_button(
-                                        "📥 Previous CSV", data=f,
-                                        file_name=prev_csv.name, mime="text/csv"
-                                    )
+                                st.download_button(
+                                    "📥 Previous CSV", data=download_bytes(prev_csv),
+                                    file_name=prev_csv.name, mime="text/csv"
+                                )
                             with d2:
-                                with open(report, "rb") as f:
-                                    st.download_button(
-                                        "📥 No-Changes Report", data=f,
-                                        file_name=report.name, mime="text/plain"
-                                    )
+                                st.download_button(
+                                    "📥 No-Changes Report", data=download_bytes(report),
+                                    file_name=report.name, mime="text/plain"
+                                )
                             
-                            auto_save_chat()
-                            st.caption("💾 Chat auto-saved")
+                            if auto_save_chat():
+                                st.caption("💾 Chat auto-saved")
                             
                             st.session_state.pending_git = None
                             return
@@ -749,40 +1425,46 @@ def display_chat():
                     if change_info.get("has_changes"):
                         changed_files = change_info.get("changed_files", [])
                         
+                        # Status -> bucket for dict entries; unknown statuses are skipped
+                        by_status = {
+                            "A": added_files,
+                            "D": deleted_files,
+                            "M": modified_files,
+                            "R": modified_files,
+                        }
+                        # Sets for plain-path entries, so each lookup is O(1)
+                        new_set = set(change_info.get("new_files") or ())
+                        deleted_set = set(change_info.get("deleted_files") or ())
+                        
                         for change in changed_files:
                             if isinstance(change, dict):
-                                status = change.get("status", "M")
-                                filepath = change.get("file", "")
-                                if status == "A":
-                                    added_files.append(filepath)
-                                elif status == "D":
-                                    deleted_files.append(filepath)
-                                elif status in ["M", "R"]:
-                                    modified_files.append(filepath)
+                                bucket = by_status.get(change.get("status", "M"))
+                                if bucket is not None:
+                                    bucket.append(change.get("file", ""))
+                            # Handle case where git_handler returns simple file paths
+                            elif change in new_set:
+                                added_files.append(change)
+                            elif change in deleted_set:
+                                deleted_files.append(change)
                             else:
-                                # Handle case where git_handler returns simple file paths
-                                if change in change_info.get("new_files", []):
-                                    added_files.append(change)
-                                elif change in change_info.get("deleted_files", []):
-                                    deleted_files.append(change)
-                                elif change in change_info.get("modified_files", []):
-                                    modified_files.append(change)
-                                else:
-                                    modified_files.append(str(change))
+                                # Listed as modified or unclassified: regenerate either way
+                                modified_files.append(str(change))
                         
                         files_to_process = added_files + modified_files
                         
+                        # One summary element instead of an alert per category
+                        summary = []
                         if deleted_files:
-                            deleted_names = [Path(f).name for f in deleted_files]
-                            st.warning(f"🗑️ Detected **{len(deleted_files)}** deleted file(s): {', '.join(deleted_names)}")
+                            deleted_names = [os.path.basename(f) for f in deleted_files]
+                            summary.append(f"🗑️ Detected **{len(deleted_files)}** deleted file(s): {', '.join(deleted_names)}")
                         
                         if modified_files:
-                            modified_names = [Path(f).name for f in modified_files]
-                            st.info(f"✏️ Detected **{len(modified_files)}** modified file(s): {', '.join(modified_names)}")
+                            modified_names = [os.path.basename(f) for f in modified_files]
+                            summary.append(f"✏️ Detected **{len(modified_files)}** modified file(s): {', '.join(modified_names)}")
                         
                         if added_files:
-                            added_names = [Path(f).name for f in added_files]
-                            st.success(f"➕ Detected **{len(added_files)}** new file(s): {', '.join(added_names)}")
+                            added_names = [os.path.basename(f) for f in added_files]
+                            summary.append(f"➕ Detected **{len(added_files)}** new file(s): {', '.join(added_names)}")
                         
                         if files_to_process:
                             code_files = gh.get_changed_code_files(repo_path, files_to_process)
@@ -793,62 +1475,82 @@ def display_chat():
                             if modified_files:
                                 change_summary.append(f"**{len(modified_files)}** modified")
                             
-                            st.info(f"📝 Processing {', '.join(change_summary)} file(s)")
+                            summary.append(f"📝 Processing {', '.join(change_summary)} file(s)")
                         else:
                             code_files = []
-                            st.info("🗑️ Only deletions detected, no new tests to generate")
+                            summary.append("🗑️ Only deletions detected, no new tests to generate")
+                        
+                        st.info("\n\n".join(summary))
                     else:
                         # First time clone
                         code_files = gh.get_code_files(repo_path)
 
                     # Parse code
-                    parser = CodeParser()
+                    parser = get_code_parser()
                     parsed = {}
                     
                     if code_files:
                         prog = st.progress(0)
-                        for i, fp in enumerate(code_files):
-                            try:
-                                with open(fp, "r", encoding="utf-8", errors="ignore") as f:
-                                    parsed[fp.name] = parser.parse_code(f.read(), fp.name)
-                            except Exception as e:
-                                logger.warning(f"Parse error {fp}: {e}")
-                            prog.progress((i + 1) / len(code_files))
+                        # Key by repo-relative path so same-named files in
+                        # different directories are not collapsed into one
+                        parsed = parse_files_parallel(
+                            parser,
+                            {Path(os.path.relpath(fp, repo_path)).as_posix(): str(fp) for fp in code_files},
+                            prog,
+                        )
                         prog.empty()
 
                     # ✅ USE git_handler for function-level change detection (for info only)
                     function_changes = {}
                     if modified_files:
-                        st.info("🔍 Analyzing modified files for function-level changes...")
+                        # The progress note is replaced in place by the summary
+                        function_status = st.empty()
+                        function_status.info("🔍 Analyzing modified files for function-level changes...")
                         function_changes = gh.get_function_changes(repo_path, modified_files, parser)
                         
                         # Show function changes for user info
+                        summary = []
                         removed_functions = function_changes.get('removed_functions', {})
                         if removed_functions:
-                            total_removed = sum(len(funcs) for funcs in removed_functions.values())
+                            # Count and list in one pass over the files
+                            total_removed = 0
                             removed_details = []
                             for file, funcs in removed_functions.items():
-                                removed_details.append(f"{file}: {', '.join(funcs)}")
-                            st.warning(f"🗑️ Removed **{total_removed}** function(s):\n" + "\n".join(f"  • {detail}" for detail in removed_details))
+                                total_removed += len(funcs)
+                                removed_details.append(f"- {file}: {', '.join(funcs)}")
+                            summary.append(f"🗑️ Removed **{total_removed}** function(s):\n" + "\n".join(removed_details))
                         
                         added_functions = function_changes.get('added_functions', {})
                         if added_functions:
                             total_added = sum(len(funcs) for funcs in added_functions.values())
-                            st.success(f"➕ Added **{total_added}** new function(s)")
+                            summary.append(f"➕ Added **{total_added}** new function(s)")
                         
                         modified_functions_dict = function_changes.get('modified_functions', {})
                         if modified_functions_dict:
                             total_modified = sum(len(funcs) for funcs in modified_functions_dict.values())
-                            st.info(f"✏️ Modified **{total_modified}** function(s)")
+                            summary.append(f"✏️ Modified **{total_modified}** function(s)")
+                        
+                        if summary:
+                            function_status.info("\n\n".join(summary))
+                        else:
+                            function_status.empty()
 
                     # Generate tests
                     tests = {}
                     if parsed:
-                        st.session_state.rag_system.add_code_documents(parsed)
+                        # Saved to disk together with the test cases below
+                        st.session_state.rag_system.add_code_documents(parsed, persist=False)
                         
-                        gen = TestGenerator(st.session_state.llm_handler, st.session_state.rag_system)
-                        tests = gen.generate_tests(parsed, test_types, module_level=True)
+                        from test_generator import TestGenerator
+                        gen = TestGenerator(get_llm_handler(), st.session_state.rag_system)
+                        gen_prog = st.progress(0.0)
+                        tests = gen.generate_tests(
+                            parsed, test_types, module_level=True, progress_callback=gen_prog.progress
+                        )
+                        gen_prog.empty()
+                        display_generation_failures(tests)
                         st.session_state.generated_tests = tests
+                        st.session_state.has_test_results = True
                         st.session_state.rag_system.add_test_cases(tests, session_id="current")
 
                         # Debug: Log the test structure
@@ -862,7 +1564,7 @@ def display_chat():
                             return
 
                     # Intelligent CSV handling with file-level regeneration
-                    csv_h = CSVHandler()
+                    csv_h = get_csv_handler()
                     
                     repo_url = pend["url"]
                     if repo_url in st.session_state.current_repo_csv:
@@ -876,6 +1578,13 @@ def display_chat():
                         if prev_csv:
                             logger.info(f"📁 Using disk CSV for {repo_url}")
                     
+                    # The report only depends on `tests`, so write it on a worker
+                    # thread while the CSV is cleaned and appended below (skipped
+                    # when there will be no CSV and the flow returns early)
+                    report_future = None
+                    if tests or (prev_csv and change_info.get("has_changes")):
+                        report_future = get_upload_pool().submit(csv_h.generate_professional_test_report, tests)
+                    
                     if prev_csv and change_info.get("has_changes"):
                         # ✅ INTELLIGENT REMOVAL: Remove tests for deleted files AND modified files (will regenerate)
                         cleaned_csv, removed_count, removal_stats = remove_test_cases_from_csv(
@@ -911,8 +1620,7 @@ def display_chat():
                             logger.info(f"🔍 New tests - Unit: {unit_count}, Functional: {functional_count}, Total: {total_new}")
                             
                             # Count total tests from the final CSV file (SOURCE OF TRUTH)
-                            with open(csv_file, 'r', encoding='utf-8') as f:
-                                total_tests = sum(1 for line in f) - 1  # -1 for header
+                            total_tests = count_lines(csv_file) - 1  # -1 for header
                             
                             #logger.info(f"🔍 Final CSV has {total_tests} total tests")
                             
@@ -928,8 +1636,7 @@ def display_chat():
                             # Only deletions, no new tests
                             csv_file = cleaned_csv
                             
-                            with open(csv_file, 'r', encoding='utf-8') as f:
-                                total_tests = sum(1 for line in f) - 1
+                            total_tests = count_lines(csv_file) - 1  # -1 for header
                             
                             st.session_state.current_repo_csv[repo_url] = str(csv_file)
                             
@@ -962,8 +1669,7 @@ def display_chat():
                         logger.info(f"🔍 New tests - Unit: {unit_count}, Functional: {functional_count}, Total: {total_new}")
                         
                         # Count total tests from the final CSV file (SOURCE OF TRUTH)
-                        with open(csv_file, 'r', encoding='utf-8') as f:
-                            total_tests = sum(1 for line in f) - 1  # -1 for header
+                        total_tests = count_lines(csv_file) - 1  # -1 for header
                         
                         logger.info(f"🔍 Final CSV has {total_tests} total tests")
                         
@@ -972,23 +1678,26 @@ def display_chat():
                         # Display count from CSV (source of truth)
                         st.success(f"✅ Generated **{total_tests}** test cases ({unit_count} Unit, {functional_count} Functional)")
 
-                    report_file = csv_h.generate_professional_test_report(tests)
+                    if report_future is not None:
+                        report_file = report_future.result()
+                    else:
+                        report_file = csv_h.generate_professional_test_report(tests)
 
+                    # One timestamp so the paired downloads share a name suffix
+                    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
                     d1, d2 = st.columns(2)
                     with d1:
-                        with open(csv_file, "rb") as f:
-                            st.download_button(
-                                "📥 Download CSV", data=f,
-                                file_name=f"tests_{datetime.now():%Y%m%d_%H%M%S}.csv",
-                                mime="text/csv",
-                            )
+                        st.download_button(
+                            "📥 Download CSV", data=download_bytes(csv_file),
+                            file_name=f"tests_{ts}.csv",
+                            mime="text/csv",
+                        )
                     with d2:
-                        with open(report_file, "rb") as f:
-                            st.download_button(
-                                "📥 Download Report", data=f,
-                                file_name=f"report_{datetime.now():%Y%m%d_%H%M%S}.txt",
-                                mime="text/plain",
-                            )
+                        st.download_button(
+                            "📥 Download Report", data=download_bytes(report_file),
+                            file_name=f"report_{ts}.txt",
+                            mime="text/plain",
+                        )
 
                     # Repo stats
                     with st.expander("Repository Statistics"):
@@ -1003,20 +1712,10 @@ def display_chat():
                     # Show tests (only if tests were actually generated in this run)
                     if tests:
                         st.info(f"📋 Showing newly generated/regenerated tests (download CSV for complete suite)")
-                        for ttype in test_types:
-                            lst = tests.get(ttype, [])
-                            if lst:
-                                with st.expander(f"{ttype}s ({len(lst)} new)", expanded=False):
-                                    for i, t in enumerate(lst[:10], 1):
-                                        if t.get("format") == "professional":
-                                            display_professional_test(t, i)
-                                        else:
-                                            display_code_test(t, i)
-                                    if len(lst) > 10:
-                                        st.info(f"... and {len(lst)-10} more (download CSV)")
-
-                    auto_save_chat()
-                    st.caption("💾 Chat auto-saved")
+                        display_test_results(tests, test_types, label=" new", expanded=False)
+
+                    if auto_save_chat():
+                        st.caption("💾 Chat auto-saved")
 
                     st.session_state.pending_git = None
 
@@ -2,15 +2,42 @@
 Chat History Manager for persistent conversation storage
 """
 import json
+import os
+import tempfile
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from logger import get_app_logger
 
+try:
+    import orjson  # Optional: faster session (de)serialisation
+except ImportError:
+    orjson = None
+
 logger = get_app_logger("chat_manager")
 
+
+def _dump_message(message: Dict) -> bytes:
+    """Serialise one message as a compact JSONL line"""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+
+def _load_message(line: bytes) -> Dict:
+    """Parse one JSONL message line"""
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
 class ChatManager:
-    """Manage chat history with persistence"""
+    """
+    Manage chat history with persistence
+
+    Each session is stored as an append-only `{session_id}.jsonl` file (one
+    message per line) next to a small `{session_id}.meta.json` holding the
+    title, timestamps and message count. Sessions saved by older versions as
+    a single `{session_id}.json` are converted on first access.
+    """
     
     def __init__(self, history_dir: Path = None):
         """Initialize chat manager"""
@@ -20,25 +47,31 @@ class ChatManager:
         self.current_session_file = None
         self.current_session_id = None
         
+        # header file -> (mtime_ns, session summary) for list_sessions
+        self._meta_cache: Dict[Path, Tuple[int, Dict]] = {}
+        
         logger.info(f"✅ ChatManager initialized with directory: {self.history_dir}")
     
     def start_new_session(self, title: str = None) -> str:
         """Start a new chat session"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        started = datetime.now()
+        timestamp = started.strftime("%Y%m%d_%H%M%S")
+        now = started.isoformat()
         session_id = f"session_{timestamp}"
         
         self.current_session_id = session_id
-        self.current_session_file = self.history_dir / f"{session_id}.json"
+        self.current_session_file = self._messages_file(session_id)
+        self.current_session_file.touch()
         
-        session_data = {
+        meta = {
             'session_id': session_id,
             'title': title or f"Chat {timestamp}",
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
-            'messages': []
+            'created_at': now,
+            'updated_at': now,
+            'message_count': 0
         }
         
-        self._save_session(session_data)
+        self._save_session(meta, self._meta_file(session_id))
         logger.info(f"📝 New session started: {session_id}")
         
         return session_id
@@ -53,19 +86,24 @@ class ChatManager:
         if not self.current_session_id:
             self.start_new_session()
         
-        session_data = self._load_session(self.current_session_file)
-        
+        now = datetime.now().isoformat()
         message = {
             'role': role,
             'content': content,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now,
             'metadata': metadata or {}
         }
         
-        session_data['messages'].append(message)
-        session_data['updated_at'] = datetime.now().isoformat()
+        # Append the message instead of rewriting the whole session
+        with open(self.current_session_file, 'ab') as f:
+            f.write(_dump_message(message))
+        
+        meta_file = self._meta_file(self.current_session_id)
+        meta = self._load_session(meta_file)
+        meta['message_count'] = meta.get('message_count', 0) + 1
+        meta['updated_at'] = now
         
-        self._save_session(session_data)
+        self._save_session(meta, meta_file)
         logger.debug(f"💬 Message added: {role} - {len(content)} chars")
     
     def get_current_history(self) -> List[Dict]:
@@ -73,24 +111,41 @@ class ChatManager:
         if not self.current_session_file or not self.current_session_file.exists():
             return []
         
-        session_data = self._load_session(self.current_session_file)
-        return session_data.get('messages', [])
+        return self._read_messages(self.current_session_file)
     
     def list_sessions(self, limit: int = 50) -> List[Dict]:
         """List all chat sessions"""
+        # session_id -> file holding its header; the meta sidecar wins over a
+        # legacy single-file session with the same id
+        session_files = {}
+        for file in self.history_dir.glob("session_*.json"):
+            if file.name.endswith(".meta.json"):
+                session_files[file.name[:-len(".meta.json")]] = file
+            else:
+                session_files.setdefault(file.stem, file)
+        
         sessions = []
         
-        for file in sorted(self.history_dir.glob("session_*.json"), reverse=True)[:limit]:
+        for session_id in sorted(session_files, reverse=True)[:limit]:
+            file = session_files[session_id]
             try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    sessions.append({
-                        'session_id': data['session_id'],
-                        'title': data['title'],
-                        'created_at': data['created_at'],
-                        'updated_at': data['updated_at'],
-                        'message_count': len(data.get('messages', []))
-                    })
+                mtime_ns = file.stat().st_mtime_ns
+                cached = self._meta_cache.get(file)
+                if cached and cached[0] == mtime_ns:
+                    sessions.append(dict(cached[1]))
+                    continue
+                
+                data = self._load_session(file)
+                summary = {
+                    'session_id': data['session_id'],
+                    'title': data['title'],
+                    'created_at': data['created_at'],
+                    'updated_at': data['updated_at'],
+                    'message_count': data['message_count'] if 'message_count' in data
+                    else len(data.get('messages', []))
+                }
+                self._meta_cache[file] = (mtime_ns, summary)
+                sessions.append(dict(summary))
             except Exception as e:
                 logger.error(f"❌ Error loading session {file.name}: {e}")
                 continue
@@ -99,26 +154,34 @@ class ChatManager:
     
     def load_session(self, session_id: str) -> Optional[Dict]:
         """Load a specific session"""
-        session_file = self.history_dir / f"{session_id}.json"
+        meta_file = self._ensure_session(session_id)
         
-        if not session_file.exists():
+        if not meta_file:
             logger.warning(f"⚠️ Session not found: {session_id}")
             return None
         
         self.current_session_id = session_id
-        self.current_session_file = session_file
+        self.current_session_file = self._messages_file(session_id)
         
-        session_data = self._load_session(session_file)
+        session_data = self._load_session(meta_file)
+        session_data['messages'] = self._read_messages(self.current_session_file)
         logger.info(f"📂 Session loaded: {session_id}")
         
         return session_data
     
     def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
-        session_file = self.history_dir / f"{session_id}.json"
+        session_files = [
+            self._messages_file(session_id),
+            self._meta_file(session_id),
+            self._legacy_file(session_id)
+        ]
         
-        if session_file.exists():
-            session_file.unlink()
+        if any(file.exists() for file in session_files):
+            for file in session_files:
+                self._meta_cache.pop(file, None)
+                if file.exists():
+                    file.unlink()
             logger.info(f"🗑️ Session deleted: {session_id}")
             
             if self.current_session_id == session_id:
@@ -131,16 +194,16 @@ class ChatManager:
     
     def update_session_title(self, session_id: str, new_title: str) -> bool:
         """Update session title"""
-        session_file = self.history_dir / f"{session_id}.json"
+        meta_file = self._ensure_session(session_id)
         
-        if not session_file.exists():
+        if not meta_file:
             return False
         
-        session_data = self._load_session(session_file)
-        session_data['title'] = new_title
-        session_data['updated_at'] = datetime.now().isoformat()
+        meta = self._load_session(meta_file)
+        meta['title'] = new_title
+        meta['updated_at'] = datetime.now().isoformat()
         
-        self._save_session(session_data, session_file)
+        self._save_session(meta, meta_file)
         logger.info(f"✏️ Session title updated: {session_id}")
         
         return True
@@ -153,15 +216,18 @@ class ChatManager:
     
     def export_session(self, session_id: str, format: str = 'json') -> Optional[Path]:
         """Export session to file"""
-        session_file = self.history_dir / f"{session_id}.json"
+        meta_file = self._ensure_session(session_id)
         
-        if not session_file.exists():
+        if not meta_file:
             return None
         
-        session_data = self._load_session(session_file)
+        session_data = self._load_session(meta_file)
+        session_data['messages'] = self._read_messages(self._messages_file(session_id))
         
         if format == 'json':
-            return session_file
+            json_file = self.history_dir / f"export_{session_id}.json"
+            self._save_session(session_data, json_file)
+            return json_file
         elif format == 'txt':
             txt_file = self.history_dir / f"{session_id}.txt"
             
@@ -183,13 +249,75 @@ class ChatManager:
         """Save session data to file"""
         file = file or self.current_session_file
         
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        # Write a sibling temp file and swap it in, so concurrent readers see
+        # either the old or the new session, never a partially written one
+        fd, tmp_path = tempfile.mkstemp(dir=file.parent, prefix=f".{file.stem}_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if orjson is not None:
+                    f.write(orjson.dumps(session_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                else:
+                    f.write(json.dumps(session_data, indent=2, ensure_ascii=False).encode('utf-8'))
+            os.replace(tmp_path, file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
     
     def _load_session(self, file: Path) -> Dict:
         """Load session data from file"""
-        with open(file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        data = file.read_bytes()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    
+    def _messages_file(self, session_id: str) -> Path:
+        """Append-only message log of a session"""
+        return self.history_dir / f"{session_id}.jsonl"
+    
+    def _meta_file(self, session_id: str) -> Path:
+        """Title/timestamp sidecar of a session"""
+        return self.history_dir / f"{session_id}.meta.json"
+    
+    def _legacy_file(self, session_id: str) -> Path:
+        """Single-file session written by older versions"""
+        return self.history_dir / f"{session_id}.json"
+    
+    def _read_messages(self, file: Path) -> List[Dict]:
+        """Read every message of a JSONL message log"""
+        if not file.exists():
+            return []
+        
+        with open(file, 'rb') as f:
+            return [_load_message(line) for line in f if line.strip()]
+    
+    def _ensure_session(self, session_id: str) -> Optional[Path]:
+        """
+        Return the meta file of a session, converting a legacy session first
+        
+        Returns:
+            Path of the meta file, or None if the session does not exist
+        """
+        meta_file = self._meta_file(session_id)
+        if meta_file.exists():
+            return meta_file
+        
+        legacy_file = self._legacy_file(session_id)
+        if not legacy_file.exists():
+            return None
+        
+        session_data = self._load_session(legacy_file)
+        messages = session_data.pop('messages', [])
+        session_data['message_count'] = len(messages)
+        
+        with open(self._messages_file(session_id), 'wb') as f:
+            f.write(b"".join(_dump_message(message) for message in messages))
+        
+        # Meta goes last: its presence marks the conversion as complete
+        self._save_session(session_data, meta_file)
+        legacy_file.unlink()
+        self._meta_cache.pop(legacy_file, None)
+        logger.info(f"📦 Converted legacy session to JSONL: {session_id}")
+        
+        return meta_file
     
     def get_statistics(self) -> Dict:
         """Get chat statistics"""
@@ -2,52 +2,329 @@
 Enhanced Universal Code Parser with comprehensive multi-language support
 """
 import ast
+import mmap
 import re
+import sys
+from bisect import bisect_left
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from logger import get_app_logger
 
 logger = get_app_logger("code_parser")
 
+# Bump whenever parse output changes, so persisted parse caches are invalidated
+PARSER_VERSION = "6"
+
+# read_source decodes files larger than this straight from a memory map
+MMAP_THRESHOLD = 64 * 1024
+
+# Lower-cased file extension -> language
+_EXTENSION_LANGUAGES = {
+    'py': 'python',
+    'js': 'javascript',
+    'jsx': 'jsx',
+    'ts': 'typescript',
+    'tsx': 'tsx',
+    'java': 'java',
+    'cpp': 'cpp', 'cc': 'cpp', 'cxx': 'cpp', 'hpp': 'cpp', 'h++': 'cpp',
+    'c': 'c', 'h': 'c',
+    'cs': 'csharp',
+    'go': 'go',
+    'rs': 'rust',
+    'rb': 'ruby',
+    'php': 'php',
+    'swift': 'swift',
+    'kt': 'kotlin', 'kts': 'kotlin',
+    'scala': 'scala',
+    'r': 'r',
+    'm': 'matlab',
+}
+
+# ---- Compiled patterns --------------------------------------------------------
+# Compiled once at import, so parsing never goes through re's pattern cache
+# Patterns begin at a keyword or word boundary, never with optional whitespace
+# or a bare \w+, so a failed match cannot backtrack over long runs of either
+
+# JavaScript: one alternation, so the source is scanned once. The outer group
+# of each branch names the construct (match.lastgroup)
+_JAVASCRIPT_BRANCHES = (
+    r'(?P<function>function\s+(?P<function_name>\w+)\s*\([^)]*\))',
+    r'(?P<function_expr>(?:const|let|var)\s+(?P<function_expr_name>\w+)\s*=\s*function\s*\([^)]*\))',
+    r'(?P<arrow>(?:const|let|var)\s+(?P<arrow_name>\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>)',
+    r'(?P<class>class\s+(?P<class_name>\w+)(?:\s+extends\s+(?P<class_extends>\w+))?)',
+    r'(?P<import>import\s+(?:\{[^}]+\}|\w+|\*\s+as\s+\w+)\s+from\s+[\'"](?P<import_module>[^\'"]+)[\'"])',
+    r'(?P<require>(?:const|let|var)\s+\{?[^}=]+\}?\s*=\s*require\([\'"](?P<require_module>[^\'"]+)[\'"]\))',
+)
+_JAVASCRIPT_RE = re.compile('|'.join(_JAVASCRIPT_BRANCHES))
+
+# TypeScript: the JavaScript branches plus TS-only constructs, still one pass
+_TYPESCRIPT_BRANCHES = (
+    r'(?P<interface>interface\s+(?P<interface_name>\w+)(?:<[^>]+>)?\s*(?:extends\s+(?P<interface_extends>[^{]+))?\s*\{)',
+    r'(?P<type>type\s+(?P<type_name>\w+)(?:<[^>]+>)?\s*=)',
+    r'(?P<enum>enum\s+(?P<enum_name>\w+)\s*\{)',
+    r'(?P<decorator>@(?P<decorator_name>\w+)(?:\([^)]*\))?)',
+)
+_TYPESCRIPT_RE = re.compile('|'.join(_JAVASCRIPT_BRANCHES + _TYPESCRIPT_BRANCHES))
+
+# Java
+_JAVA_METHOD_RE = re.compile(r'(?<![\w<>\[\]])[\w<>\[\]]+\s+(\w+)\s*\([^)]*\)\s*(?:throws\s+[\w\s,]+)?\{')
+_JAVA_CLASS_RE = re.compile(r'(?:public\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?\s*\{')
+_JAVA_INTERFACE_RE = re.compile(r'(?:public\s+)?interface\s+(\w+)(?:\s+extends\s+([^{]+))?\s*\{')
+_JAVA_ENUM_RE = re.compile(r'(?:public\s+)?enum\s+(\w+)\s*\{')
+_JAVA_IMPORT_RE = re.compile(r'import\s+(?:static\s+)?([\w.]+(?:\.\*)?);')
+_JAVA_ANNOTATION_RE = re.compile(r'@(\w+)(?:\([^)]*\))?')
+
+# C / C++ (shared)
+_C_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_INCLUDE_RE = re.compile(r'#include\s*[<"]([^>"]+)[>"]')
+
+# C++
+_CPP_FUNC_RE = re.compile(r'\b(?:virtual\s+)?(?:static\s+)?(?:inline\s+)?(?:\w+(?:\s*\*|\s*&)?)\s+(\w+)\s*\([^)]*\)(?:\s*const)?(?:\s*override)?\s*[;{]')
+_CPP_CLASS_RE = re.compile(r'class\s+(\w+)(?:\s*:\s*(?:public|private|protected)\s+(\w+))?\s*\{')
+_CPP_STRUCT_RE = re.compile(r'struct\s+(\w+)\s*\{')
+_CPP_NAMESPACE_RE = re.compile(r'namespace\s+(\w+)\s*\{')
+_CPP_TEMPLATE_RE = re.compile(r'template\s*<([^>]+)>\s*(?:class|struct|typename)\s+(\w+)')
+
+# C
+_C_FUNC_RE = re.compile(r'\b(?:static\s+)?(?:inline\s+)?(?:\w+(?:\s*\*)?)\s+(\w+)\s*\([^)]*\)\s*\{')
+_C_STRUCT_RE = re.compile(r'(?:typedef\s+)?struct\s+(\w+)?\s*\{')
+_C_TYPEDEF_RE = re.compile(r'typedef\s+(?:struct\s+)?(?:\w+)\s+(\w+);')
+
+# C#
+_CSHARP_METHOD_RE = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:async\s+)?(?:virtual\s+)?(?:override\s+)?(?:\w+(?:<[^>]+>)?)\s+(\w+)\s*\([^)]*\)\s*\{')
+_CSHARP_PROPERTY_RE = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:\w+(?:<[^>]+>)?)\s+(\w+)\s*\{[^}]*\}')
+_CSHARP_CLASS_RE = re.compile(r'(?:(?:public|private|internal)\s+)?(?:(?:abstract|sealed)\s+)?(?:partial\s+)?class\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{')
+_CSHARP_INTERFACE_RE = re.compile(r'(?:(?:public|private|internal)\s+)?interface\s+(\w+)\s*\{')
+_CSHARP_ENUM_RE = re.compile(r'(?:(?:public|private|internal)\s+)?enum\s+(\w+)\s*\{')
+_CSHARP_NAMESPACE_RE = re.compile(r'namespace\s+([\w.]+)\s*\{')
+_CSHARP_ATTRIBUTE_RE = re.compile(r'\[(\w+)(?:\([^)]*\))?\]')
+_CSHARP_USING_RE = re.compile(r'using\s+([\w.]+);')
+
+# Go
+_GO_FUNC_RE = re.compile(r'func\s+(\w+)\s*\([^)]*\)(?:\s*\([^)]*\))?\s*\{')
+_GO_METHOD_RE = re.compile(r'func\s*\([^)]+\)\s*(\w+)\s*\([^)]*\)(?:\s*\([^)]*\))?\s*\{')
+_GO_STRUCT_RE = re.compile(r'type\s+(\w+)\s+struct\s*\{')
+_GO_INTERFACE_RE = re.compile(r'type\s+(\w+)\s+interface\s*\{')
+_GO_IMPORT_RE = re.compile(r'import\s+(?:\(\s*([^)]+)\s*\)|"([^"]+)")')
+_GO_IMPORT_PATH_RE = re.compile(r'"([^"]+)"')
+
+# Rust
+_RUST_FUNC_RE = re.compile(r'(?:pub\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(\w+)(?:<[^>]+>)?\s*\(')
+_RUST_STRUCT_RE = re.compile(r'(?:pub\s+)?struct\s+(\w+)(?:<[^>]+>)?\s*[{\(]')
+_RUST_ENUM_RE = re.compile(r'(?:pub\s+)?enum\s+(\w+)(?:<[^>]+>)?\s*\{')
+_RUST_TRAIT_RE = re.compile(r'(?:pub\s+)?trait\s+(\w+)(?:<[^>]+>)?\s*\{')
+_RUST_IMPL_RE = re.compile(r'impl(?:<[^>]+>)?\s+(?:(\w+)\s+for\s+)?(\w+)\s*\{')
+_RUST_USE_RE = re.compile(r'use\s+([\w:]+(?:\s*as\s+\w+)?);')
+
+# Ruby
+_RUBY_METHOD_RE = re.compile(r'def\s+(?:self\.)?(\w+[?!]?)\s*(?:\([^)]*\))?')
+_RUBY_CLASS_RE = re.compile(r'class\s+(\w+)(?:\s*<\s*(\w+))?')
+_RUBY_MODULE_RE = re.compile(r'module\s+(\w+)')
+_RUBY_REQUIRE_RE = re.compile(r'require\s+[\'"]([^\'"]+)[\'"]')
+
+# PHP
+_PHP_FUNC_RE = re.compile(r'function\s+(\w+)\s*\(')
+_PHP_CLASS_RE = re.compile(r'class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?\s*\{')
+_PHP_INTERFACE_RE = re.compile(r'interface\s+(\w+)\s*\{')
+_PHP_TRAIT_RE = re.compile(r'trait\s+(\w+)\s*\{')
+_PHP_NAMESPACE_RE = re.compile(r'namespace\s+([\w\\]+);')
+_PHP_USE_RE = re.compile(r'use\s+([\w\\]+)(?:\s+as\s+(\w+))?;')
+
+# Swift
+_SWIFT_FUNC_RE = re.compile(r'func\s+(\w+)(?:<[^>]+>)?\s*\(')
+_SWIFT_CLASS_RE = re.compile(r'class\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{')
+_SWIFT_STRUCT_RE = re.compile(r'struct\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{')
+_SWIFT_PROTOCOL_RE = re.compile(r'protocol\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{')
+_SWIFT_EXTENSION_RE = re.compile(r'extension\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{')
+_SWIFT_IMPORT_RE = re.compile(r'import\s+([\w.]+)')
+
+# Kotlin
+_KOTLIN_FUNC_RE = re.compile(r'fun\s+(?:<[^>]+>\s+)?(\w+)\s*\(')
+_KOTLIN_DATA_CLASS_RE = re.compile(r'data\s+class\s+(\w+)\s*\(')
+_KOTLIN_CLASS_RE = re.compile(r'(?:(?:open|abstract)\s+)?class\s+(\w+)(?:\s*:\s*([^{(]+))?\s*[{(]')
+_KOTLIN_INTERFACE_RE = re.compile(r'interface\s+(\w+)\s*\{')
+_KOTLIN_OBJECT_RE = re.compile(r'object\s+(\w+)\s*[:{]')
+_KOTLIN_IMPORT_RE = re.compile(r'import\s+([\w.]+)')
+
+# Generic fallback
+_GENERIC_FUNC_RES = (
+    re.compile(r'(?:def|function|func|fn|sub|procedure)\s+(\w+)'),
+    re.compile(r'\b(\w+)\s*\([^)]*\)\s*[{:]'),
+)
+_GENERIC_CLASS_RE = re.compile(r'(?:class|struct|interface|type|record)\s+(\w+)')
+
+
+_NEWLINE_RE = re.compile(r'\n')
+
+
+class _LineIndex:
+    """Maps string offsets to 1-based line numbers by binary search"""
+    
+    __slots__ = ('code', 'newlines')
+    
+    def __init__(self, code: str):
+        self.code = code
+        self.newlines = None
+    
+    def line(self, offset: int) -> int:
+        """Line number of the character at offset"""
+        if self.newlines is None:
+            # Sorted offsets of every newline, collected in one C-level scan on
+            # first use, so files without matches never pay for it
+            self.newlines = [m.start() for m in _NEWLINE_RE.finditer(self.code)]
+        return bisect_left(self.newlines, offset) + 1
+
+
+# Record fields holding identifiers that recur across files
+_INTERNED_FIELDS = ('name', 'extends', 'inherits', 'implements', 'trait', 'type')
+
+
+def intern_names(parsed_data: Dict) -> Dict:
+    """
+    Intern identifier strings in parse output, in place.
+    
+    Names such as 'get' or common base classes repeat across thousands of
+    files; interning makes retained results share one object per name.
+    Deserialised results (disk cache, worker processes) need this again.
+    """
+    for value in parsed_data.values():
+        if not isinstance(value, list):
+            continue
+        for i, item in enumerate(value):
+            if isinstance(item, str):
+                value[i] = sys.intern(item)
+            elif isinstance(item, dict):
+                for field in _INTERNED_FIELDS:
+                    name = item.get(field)
+                    if isinstance(name, str):
+                        item[field] = sys.intern(name)
+    return parsed_data
+
+
+def decode_source(data) -> str:
+    """
+    Decode source bytes (or any buffer, e.g. an mmap) to text
+    
+    This is the single decoding policy for source files: a UTF-8 BOM is
+    dropped and invalid bytes are replaced, so the same file always decodes
+    to the same text whether it came from disk or from git.
+    """
+    return str(data, 'utf-8-sig', 'replace')
+
+
+def read_source(path) -> str:
+    """
+    Read and decode a source file
+    
+    Small files are read with a single read call; large ones are decoded
+    directly from a read-only memory map, so the raw bytes are never copied
+    onto the heap first.
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        if path.stat().st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return decode_source(buf)
+        return decode_source(f.read())
+
+
+def _strip_c_comments(code: str) -> str:
+    """
+    Remove // and /* */ comments in a single pass.
+    
+    Comments are replaced by the newlines they contained, so line numbers in
+    the result still match the original source.
+    """
+    if '/' not in code:
+        return code
+    return _C_COMMENT_RE.sub(lambda m: '\n' * m.group().count('\n'), code)
+
+
+class _PythonExtractor(ast.NodeVisitor):
+    """Collect functions, classes and imports from a Python AST in one walk"""
+    
+    def __init__(self, get_name):
+        self.get_name = get_name
+        self.functions = []
+        self.classes = []
+        self.imports = []
+    
+    def generic_visit(self, node):
+        # Definitions and imports are statements, so expressions are never entered
+        for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+            for child in getattr(node, field, ()):
+                self.visit(child)
+    
+    def _add_function(self, node, is_async: bool):
+        self.functions.append({
+            'name': node.name,
+            'line': node.lineno,
+            'args': [arg.arg for arg in node.args.args],
+            'docstring': ast.get_docstring(node),
+            'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')],
+            'is_async': is_async
+        })
+        self.generic_visit(node)
+    
+    def visit_FunctionDef(self, node):
+        self._add_function(node, False)
+    
+    def visit_AsyncFunctionDef(self, node):
+        self._add_function(node, True)
+    
+    def visit_ClassDef(self, node):
+        methods = [
+            n.name for n in node.body
+            if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ]
+        self.classes.append({
+            'name': node.name,
+            'line': node.lineno,
+            'methods': methods,
+            'docstring': ast.get_docstring(node),
+            'bases': [self.get_name(base) for base in node.bases],
+            'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')]
+        })
+        self.generic_visit(node)
+    
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append(alias.name)
+    
+    def visit_ImportFrom(self, node):
+        module = node.module or ''
+        for alias in node.names:
+            self.imports.append(f"{module}.{alias.name}" if module else alias.name)
+
+
 class CodeParser:
     """Parse and analyze code files across multiple programming languages"""
     
     def __init__(self):
-        self.language_patterns = {
-            'python': r'\.py$',
-            'javascript': r'\.js$',
-            'jsx': r'\.jsx$',
-            'typescript': r'\.ts$',
-            'tsx': r'\.tsx$',
-            'java': r'\.java$',
-            'cpp': r'\.(cpp|cc|cxx|hpp|h\+\+)$',
-            'c': r'\.(c|h)$',
-            'csharp': r'\.cs$',
-            'go': r'\.go$',
-            'rust': r'\.rs$',
-            'ruby': r'\.rb$',
-            'php': r'\.php$',
-            'swift': r'\.swift$',
-            'kotlin': r'\.(kt|kts)$',
-            'scala': r'\.scala$',
-            'r': r'\.(r|R)$',
-            'matlab': r'\.m$',
-        }
-        
         logger.info("✅ Enhanced Universal CodeParser initialized with support for 15+ languages")
     
     def detect_language(self, filename: str) -> str:
         """Detect programming language from filename"""
-        filename_lower = filename.lower()
+        _, dot, extension = filename.lower().rpartition('.')
+        lang = _EXTENSION_LANGUAGES.get(extension) if dot else None
         
-        for lang, pattern in self.language_patterns.items():
-            if re.search(pattern, filename_lower, re.IGNORECASE):
-                logger.debug(f"🔍 Detected language: {lang} for {filename}")
-                return lang
+        if lang:
+            logger.debug(f"🔍 Detected language: {lang} for {filename}")
+            return lang
         
         logger.debug(f"⚠️ Unknown language for {filename}")
         return 'unknown'
     
+    def parse_file(self, path: Path, filename: Optional[str] = None) -> Dict:
+        """
+        Read (see read_source) and parse a source file
+        
+        Args:
+            path: Path to the source file
+            filename: Name to report (defaults to the file's name)
+        """
+        return self.parse_code(read_source(path), filename or Path(path).name)
+    
     def parse_code(self, code: str, filename: str) -> Dict:
         """Parse code and extract structure"""
         logger.info(f"📝 Parsing code file: {filename}")
@@ -66,45 +343,49 @@ class CodeParser:
             'structs': [],
             'namespaces': [],
             'complexity': 'medium',
-            'lines_of_code': len(code.split('\n'))
+            'lines_of_code': code.count('\n') + 1
         }
         
+        # Offset -> line lookup shared by the regex parsers
+        lines = _LineIndex(code) if language != 'python' else None
+        
         # Language-specific parsing with error handling
         try:
             if language == 'python':
                 parsed_data.update(self._parse_python(code))
             elif language in ['javascript', 'jsx']:
-                parsed_data.update(self._parse_javascript(code))
+                parsed_data.update(self._parse_javascript(code, lines))
             elif language in ['typescript', 'tsx']:
-                parsed_data.update(self._parse_typescript(code))
+                parsed_data.update(self._parse_typescript(code, lines))
             elif language == 'java':
-                parsed_data.update(self._parse_java(code))
+                parsed_data.update(self._parse_java(code, lines))
             elif language == 'cpp':
-                parsed_data.update(self._parse_cpp(code))
+                parsed_data.update(self._parse_cpp(code, lines))
             elif language == 'c':
-                parsed_data.update(self._parse_c(code))
+                parsed_data.update(self._parse_c(code, lines))
             elif language == 'csharp':
-                parsed_data.update(self._parse_csharp(code))
+                parsed_data.update(self._parse_csharp(code, lines))
             elif language == 'go':
-                parsed_data.update(self._parse_go(code))
+                parsed_data.update(self._parse_go(code, lines))
             elif language == 'rust':
-                parsed_data.update(self._parse_rust(code))
+                parsed_data.update(self._parse_rust(code, lines))
             elif language == 'ruby':
-                parsed_data.update(self._parse_ruby(code))
+                parsed_data.update(self._parse_ruby(code, lines))
             elif language == 'php':
-                parsed_data.update(self._parse_php(code))
+                parsed_data.update(self._parse_php(code, lines))
             elif language == 'swift':
-                parsed_data.update(self._parse_swift(code))
+                parsed_data.update(self._parse_swift(code, lines))
             elif language == 'kotlin':
-                parsed_data.update(self._parse_kotlin(code))
+                parsed_data.update(self._parse_kotlin(code, lines))
             else:
-                parsed_data.update(self._parse_generic(code))
+                parsed_data.update(self._parse_generic(code, lines))
         except Exception as e:
             logger.error(f"❌ Error parsing {filename}: {e}", exc_info=True)
             parsed_data['parse_error'] = str(e)
         
         # Calculate complexity
         parsed_data['complexity'] = self._calculate_complexity(parsed_data)
+        intern_names(parsed_data)
         
         logger.info(f"✅ Parsed {filename}: "
                    f"{len(parsed_data['functions'])} functions, "
@@ -127,42 +408,11 @@ class CodeParser:
         try:
             tree = ast.parse(code)
             
-            for node in ast.walk(tree):
-                # Functions
-                if isinstance(node, ast.FunctionDef):
-                    result['functions'].append({
-                        'name': node.name,
-                        'line': node.lineno,
-                        'args': [arg.arg for arg in node.args.args],
-                        'docstring': ast.get_docstring(node),
-                        'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')],
-                        'is_async': isinstance(node, ast.AsyncFunctionDef)
-                    })
-                
-                # Classes
-                elif isinstance(node, ast.ClassDef):
-                    methods = [
-                        n.name for n in node.body 
-                        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
-                    ]
-                    result['classes'].append({
-                        'name': node.name,
-                        'line': node.lineno,
-                        'methods': methods,
-                        'docstring': ast.get_docstring(node),
-                        'bases': [self._get_name(base) for base in node.bases],
-                        'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')]
-                    })
-                
-                # Imports
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        result['imports'].append(alias.name)
-                
-                elif isinstance(node, ast.ImportFrom):
-                    module = node.module or ''
-                    for alias in node.names:
-                        result['imports'].append(f"{module}.{alias.name}" if module else alias.name)
+            extractor = _PythonExtractor(self._get_name)
+            extractor.visit(tree)
+            result['functions'] = extractor.functions
+            result['classes'] = extractor.classes
+            result['imports'] = extractor.imports
         
         except SyntaxError as e:
             logger.warning(f"⚠️ Python syntax error: {e}")
@@ -172,7 +422,7 @@ class CodeParser:
     
     # ==================== JAVASCRIPT PARSER ====================
     
-    def _parse_javascript(self, code: str) -> Dict:
+    def _parse_javascript(self, code: str, lines: _LineIndex) -> Dict:
         """Enhanced JavaScript parser"""
         result = {
             'functions': [],
@@ -181,99 +431,73 @@ class CodeParser:
             'exports': []
         }
         
-        # Regular functions
-        func_patterns = [
-            r'function\s+(\w+)\s*\([^)]*\)',
-            r'(?:const|let|var)\s+(\w+)\s*=\s*function\s*\([^)]*\)',
-        ]
-        
-        for pattern in func_patterns:
-            for match in re.finditer(pattern, code):
-                result['functions'].append({
-                    'name': match.group(1),
-                    'line': code[:match.start()].count('\n') + 1,
-                    'type': 'function'
-                })
+        # Functions, classes and imports (ES6 and require) in one pass
+        for match in _JAVASCRIPT_RE.finditer(code):
+            self._add_javascript_match(result, match, lines)
         
-        # Arrow functions
-        arrow_pattern = r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>'
-        for match in re.finditer(arrow_pattern, code):
-            result['functions'].append({
-                'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
-                'type': 'arrow'
-            })
+        return result
+    
+    def _add_javascript_match(self, result: Dict, match, lines: _LineIndex) -> None:
+        """Record a match of one of the _JAVASCRIPT_BRANCHES"""
+        kind = match.lastgroup
         
-        # Classes
-        class_pattern = r'class\s+(\w+)(?:\s+extends\s+(\w+))?'
-        for match in re.finditer(class_pattern, code):
+        if kind in ('import', 'require'):
+            result['imports'].append(match.group(f'{kind}_module'))
+        elif kind == 'class':
             result['classes'].append({
-                'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
-                'extends': match.group(2) if match.group(2) else None
+                'name': match.group('class_name'),
+                'line': lines.line(match.start()),
+                'extends': match.group('class_extends')
+            })
+        else:
+            result['functions'].append({
+                'name': match.group(f'{kind}_name'),
+                'line': lines.line(match.start()),
+                'type': 'arrow' if kind == 'arrow' else 'function'
             })
-        
-        # Imports (ES6)
-        import_patterns = [
-            r'import\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]',
-            r'import\s+(\w+)\s+from\s+[\'"]([^\'"]+)[\'"]',
-            r'import\s+\*\s+as\s+(\w+)\s+from\s+[\'"]([^\'"]+)[\'"]',
-        ]
-        
-        for pattern in import_patterns:
-            for match in re.finditer(pattern, code):
-                result['imports'].append(match.group(2) if len(match.groups()) > 1 else match.group(1))
-        
-        # Require statements
-        require_pattern = r'(?:const|let|var)\s+\{?([^}=]+)\}?\s*=\s*require\([\'"]([^\'"]+)[\'"]\)'
-        for match in re.finditer(require_pattern, code):
-            result['imports'].append(match.group(2))
-        
-        return result
     
     # ==================== TYPESCRIPT PARSER ====================
     
-    def _parse_typescript(self, code: str) -> Dict:
+    def _parse_typescript(self, code: str, lines: _LineIndex) -> Dict:
         """Enhanced TypeScript parser with interfaces, types, and generics"""
-        result = self._parse_javascript(code)  # Start with JS parsing
-        result['interfaces'] = []
-        result['types'] = []
-        result['enums'] = []
-        
-        # Interfaces
-        interface_pattern = r'interface\s+(\w+)(?:<[^>]+>)?\s*(?:extends\s+([^{]+))?\s*\{'
-        for match in re.finditer(interface_pattern, code):
-            result['interfaces'].append({
-                'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
-                'extends': match.group(2).strip() if match.group(2) else None
-            })
-        
-        # Type aliases
-        type_pattern = r'type\s+(\w+)(?:<[^>]+>)?\s*='
-        for match in re.finditer(type_pattern, code):
-            result['types'].append({
-                'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
-            })
-        
-        # Enums
-        enum_pattern = r'enum\s+(\w+)\s*\{'
-        for match in re.finditer(enum_pattern, code):
-            result['enums'].append({
-                'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
-            })
+        result = {
+            'functions': [],
+            'classes': [],
+            'imports': [],
+            'exports': [],
+            'interfaces': [],
+            'types': [],
+            'enums': [],
+            'decorators': []
+        }
         
-        # Decorators
-        decorator_pattern = r'@(\w+)(?:\([^)]*\))?'
-        result['decorators'] = [match.group(1) for match in re.finditer(decorator_pattern, code)]
+        # JavaScript constructs plus interfaces, type aliases, enums and
+        # decorators, all in one pass
+        for match in _TYPESCRIPT_RE.finditer(code):
+            kind = match.lastgroup
+            
+            if kind == 'interface':
+                extends = match.group('interface_extends')
+                result['interfaces'].append({
+                    'name': match.group('interface_name'),
+                    'line': lines.line(match.start()),
+                    'extends': extends.strip() if extends else None
+                })
+            elif kind in ('type', 'enum'):
+                result[f'{kind}s'].append({
+                    'name': match.group(f'{kind}_name'),
+                    'line': lines.line(match.start())
+                })
+            elif kind == 'decorator':
+                result['decorators'].append(match.group('decorator_name'))
+            else:
+                self._add_javascript_match(result, match, lines)
         
         return result
     
     # ==================== JAVA PARSER ====================
     
-    def _parse_java(self, code: str) -> Dict:
+    def _parse_java(self, code: str, lines: _LineIndex) -> Dict:
         """Enhanced Java parser"""
         result = {
             'functions': [],
@@ -285,56 +509,50 @@ class CodeParser:
         }
         
         # Method declarations
-        method_pattern = r'(?:public|private|protected|static|\s)+[\w\<\>\[\]]+\s+(\w+)\s*\([^)]*\)\s*(?:throws\s+[\w\s,]+)?\s*\{'
-        for match in re.finditer(method_pattern, code):
+        for match in _JAVA_METHOD_RE.finditer(code):
             method_name = match.group(1)
             # Skip constructors and common keywords
             if method_name not in ['if', 'while', 'for', 'switch', 'catch', 'class']:
                 result['functions'].append({
                     'name': method_name,
-                    'line': code[:match.start()].count('\n') + 1
+                    'line': lines.line(match.start())
                 })
         
         # Class declarations
-        class_pattern = r'(?:public\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?\s*\{'
-        for match in re.finditer(class_pattern, code):
+        for match in _JAVA_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'extends': match.group(2) if match.group(2) else None,
                 'implements': match.group(3).strip() if match.group(3) else None
             })
         
         # Interfaces
-        interface_pattern = r'(?:public\s+)?interface\s+(\w+)(?:\s+extends\s+([^{]+))?\s*\{'
-        for match in re.finditer(interface_pattern, code):
+        for match in _JAVA_INTERFACE_RE.finditer(code):
             result['interfaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Enums
-        enum_pattern = r'(?:public\s+)?enum\s+(\w+)\s*\{'
-        for match in re.finditer(enum_pattern, code):
+        for match in _JAVA_ENUM_RE.finditer(code):
             result['enums'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Imports
-        import_pattern = r'import\s+(?:static\s+)?([\w.]+(?:\.\*)?);'
-        for match in re.finditer(import_pattern, code):
+        for match in _JAVA_IMPORT_RE.finditer(code):
             result['imports'].append(match.group(1))
         
         # Annotations
-        annotation_pattern = r'@(\w+)(?:\([^)]*\))?'
-        result['annotations'] = list(set([match.group(1) for match in re.finditer(annotation_pattern, code)]))
+        result['annotations'] = list(set([match.group(1) for match in _JAVA_ANNOTATION_RE.finditer(code)]))
         
         return result
     
     # ==================== C++ PARSER ====================
     
-    def _parse_cpp(self, code: str) -> Dict:
+    def _parse_cpp(self, code: str, lines: _LineIndex) -> Dict:
         """Enhanced C++ parser with templates and namespaces"""
         result = {
             'functions': [],
@@ -346,63 +564,58 @@ class CodeParser:
         }
         
         # Remove comments to avoid false matches
-        code_no_comments = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-        code_no_comments = re.sub(r'/\*.*?\*/', '', code_no_comments, flags=re.DOTALL)
+        code_no_comments = _strip_c_comments(code)
+        if code_no_comments is not code:
+            lines = _LineIndex(code_no_comments)
         
         # Function declarations
-        func_pattern = r'(?:virtual\s+)?(?:static\s+)?(?:inline\s+)?(?:\w+(?:\s*\*|\s*&)?)\s+(\w+)\s*\([^)]*\)\s*(?:const)?\s*(?:override)?\s*(?:;|\{)'
-        for match in re.finditer(func_pattern, code_no_comments):
+        for match in _CPP_FUNC_RE.finditer(code_no_comments):
             func_name = match.group(1)
             if func_name not in ['if', 'while', 'for', 'switch', 'return']:
                 result['functions'].append({
                     'name': func_name,
-                    'line': code[:match.start()].count('\n') + 1
+                    'line': lines.line(match.start())
                 })
         
         # Class declarations
-        class_pattern = r'class\s+(\w+)(?:\s*:\s*(?:public|private|protected)\s+(\w+))?\s*\{'
-        for match in re.finditer(class_pattern, code_no_comments):
+        for match in _CPP_CLASS_RE.finditer(code_no_comments):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'inherits': match.group(2) if match.group(2) else None
             })
         
         # Struct declarations
-        struct_pattern = r'struct\s+(\w+)\s*\{'
-        for match in re.finditer(struct_pattern, code_no_comments):
+        for match in _CPP_STRUCT_RE.finditer(code_no_comments):
             result['structs'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Namespaces
-        namespace_pattern = r'namespace\s+(\w+)\s*\{'
-        for match in re.finditer(namespace_pattern, code_no_comments):
+        for match in _CPP_NAMESPACE_RE.finditer(code_no_comments):
             result['namespaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Templates
-        template_pattern = r'template\s*<([^>]+)>\s*(?:class|struct|typename)\s+(\w+)'
-        for match in re.finditer(template_pattern, code_no_comments):
+        for match in _CPP_TEMPLATE_RE.finditer(code_no_comments):
             result['templates'].append({
                 'name': match.group(2),
                 'parameters': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Includes
-        include_pattern = r'#include\s*[<"]([^>"]+)[>"]'
-        for match in re.finditer(include_pattern, code):
+        for match in _INCLUDE_RE.finditer(code):
             result['includes'].append(match.group(1))
         
         return result
     
     # ==================== C PARSER ====================
     
-    def _parse_c(self, code: str) -> Dict:
+    def _parse_c(self, code: str, lines: _LineIndex) -> Dict:
         """C language parser"""
         result = {
             'functions': [],
@@ -412,46 +625,43 @@ class CodeParser:
         }
         
         # Remove comments
-        code_no_comments = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-        code_no_comments = re.sub(r'/\*.*?\*/', '', code_no_comments, flags=re.DOTALL)
+        code_no_comments = _strip_c_comments(code)
+        if code_no_comments is not code:
+            lines = _LineIndex(code_no_comments)
         
         # Function declarations
-        func_pattern = r'(?:static\s+)?(?:inline\s+)?(?:\w+(?:\s*\*)?)\s+(\w+)\s*\([^)]*\)\s*\{'
-        for match in re.finditer(func_pattern, code_no_comments):
+        for match in _C_FUNC_RE.finditer(code_no_comments):
             func_name = match.group(1)
             if func_name not in ['if', 'while', 'for', 'switch', 'return']:
                 result['functions'].append({
                     'name': func_name,
-                    'line': code[:match.start()].count('\n') + 1
+                    'line': lines.line(match.start())
                 })
         
         # Struct declarations
-        struct_pattern = r'(?:typedef\s+)?struct\s+(\w+)?\s*\{'
-        for match in re.finditer(struct_pattern, code_no_comments):
+        for match in _C_STRUCT_RE.finditer(code_no_comments):
             if match.group(1):
                 result['structs'].append({
                     'name': match.group(1),
-                    'line': code[:match.start()].count('\n') + 1
+                    'line': lines.line(match.start())
                 })
         
         # Typedefs
-        typedef_pattern = r'typedef\s+(?:struct\s+)?(?:\w+)\s+(\w+);'
-        for match in re.finditer(typedef_pattern, code_no_comments):
+        for match in _C_TYPEDEF_RE.finditer(code_no_comments):
             result['typedefs'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Includes
-        include_pattern = r'#include\s*[<"]([^>"]+)[>"]'
-        for match in re.finditer(include_pattern, code):
+        for match in _INCLUDE_RE.finditer(code):
             result['includes'].append(match.group(1))
         
         return result
     
     # ==================== C# PARSER ====================
     
-    def _parse_csharp(self, code: str) -> Dict:
+    def _parse_csharp(self, code: str, lines: _LineIndex) -> Dict:
         """Enhanced C# parser with properties, attributes, and LINQ"""
         result = {
             'functions': [],
@@ -465,68 +675,60 @@ class CodeParser:
         }
         
         # Method declarations
-        method_pattern = r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:async\s+)?(?:virtual\s+)?(?:override\s+)?(?:\w+(?:<[^>]+>)?)\s+(\w+)\s*\([^)]*\)\s*\{'
-        for match in re.finditer(method_pattern, code):
+        for match in _CSHARP_METHOD_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Property declarations
-        property_pattern = r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:\w+(?:<[^>]+>)?)\s+(\w+)\s*\{[^}]*\}'
-        for match in re.finditer(property_pattern, code):
+        for match in _CSHARP_PROPERTY_RE.finditer(code):
             result['properties'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Class declarations
-        class_pattern = r'(?:public|private|internal)?\s*(?:abstract|sealed)?\s*(?:partial)?\s*class\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{'
-        for match in re.finditer(class_pattern, code):
+        for match in _CSHARP_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'inherits': match.group(2).strip() if match.group(2) else None
             })
         
         # Interfaces
-        interface_pattern = r'(?:public|private|internal)?\s*interface\s+(\w+)\s*\{'
-        for match in re.finditer(interface_pattern, code):
+        for match in _CSHARP_INTERFACE_RE.finditer(code):
             result['interfaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Enums
-        enum_pattern = r'(?:public|private|internal)?\s*enum\s+(\w+)\s*\{'
-        for match in re.finditer(enum_pattern, code):
+        for match in _CSHARP_ENUM_RE.finditer(code):
             result['enums'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Namespaces
-        namespace_pattern = r'namespace\s+([\w.]+)\s*\{'
-        for match in re.finditer(namespace_pattern, code):
+        for match in _CSHARP_NAMESPACE_RE.finditer(code):
             result['namespaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Attributes
-        attribute_pattern = r'\[(\w+)(?:\([^)]*\))?\]'
-        result['attributes'] = list(set([match.group(1) for match in re.finditer(attribute_pattern, code)]))
+        result['attributes'] = list(set([match.group(1) for match in _CSHARP_ATTRIBUTE_RE.finditer(code)]))
         
         # Using statements
-        using_pattern = r'using\s+([\w.]+);'
-        for match in re.finditer(using_pattern, code):
+        for match in _CSHARP_USING_RE.finditer(code):
             result['using_statements'].append(match.group(1))
         
         return result
     
     # ==================== GO PARSER ====================
     
-    def _parse_go(self, code: str) -> Dict:
+    def _parse_go(self, code: str, lines: _LineIndex) -> Dict:
         """Go language parser"""
         result = {
             'functions': [],
@@ -537,44 +739,39 @@ class CodeParser:
         }
         
         # Function declarations
-        func_pattern = r'func\s+(\w+)\s*\([^)]*\)(?:\s*\([^)]*\))?\s*\{'
-        for match in re.finditer(func_pattern, code):
+        for match in _GO_FUNC_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Method declarations (with receiver)
-        method_pattern = r'func\s*\([^)]+\)\s*(\w+)\s*\([^)]*\)(?:\s*\([^)]*\))?\s*\{'
-        for match in re.finditer(method_pattern, code):
+        for match in _GO_METHOD_RE.finditer(code):
             result['methods'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Struct declarations
-        struct_pattern = r'type\s+(\w+)\s+struct\s*\{'
-        for match in re.finditer(struct_pattern, code):
+        for match in _GO_STRUCT_RE.finditer(code):
             result['structs'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Interface declarations
-        interface_pattern = r'type\s+(\w+)\s+interface\s*\{'
-        for match in re.finditer(interface_pattern, code):
+        for match in _GO_INTERFACE_RE.finditer(code):
             result['interfaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Imports
-        import_pattern = r'import\s+(?:\(\s*([^)]+)\s*\)|"([^"]+)")'
-        for match in re.finditer(import_pattern, code):
+        for match in _GO_IMPORT_RE.finditer(code):
             imports_block = match.group(1) or match.group(2)
             if imports_block:
                 for line in imports_block.split('\n'):
-                    imp_match = re.search(r'"([^"]+)"', line)
+                    imp_match = _GO_IMPORT_PATH_RE.search(line)
                     if imp_match:
                         result['imports'].append(imp_match.group(1))
         
@@ -582,7 +779,7 @@ class CodeParser:
     
     # ==================== RUST PARSER ====================
     
-    def _parse_rust(self, code: str) -> Dict:
+    def _parse_rust(self, code: str, lines: _LineIndex) -> Dict:
         """Rust language parser"""
         result = {
             'functions': [],
@@ -594,56 +791,50 @@ class CodeParser:
         }
         
         # Function declarations
-        func_pattern = r'(?:pub\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(\w+)(?:<[^>]+>)?\s*\('
-        for match in re.finditer(func_pattern, code):
+        for match in _RUST_FUNC_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Struct declarations
-        struct_pattern = r'(?:pub\s+)?struct\s+(\w+)(?:<[^>]+>)?\s*[{\(]'
-        for match in re.finditer(struct_pattern, code):
+        for match in _RUST_STRUCT_RE.finditer(code):
             result['structs'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Enum declarations
-        enum_pattern = r'(?:pub\s+)?enum\s+(\w+)(?:<[^>]+>)?\s*\{'
-        for match in re.finditer(enum_pattern, code):
+        for match in _RUST_ENUM_RE.finditer(code):
             result['enums'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Trait declarations
-        trait_pattern = r'(?:pub\s+)?trait\s+(\w+)(?:<[^>]+>)?\s*\{'
-        for match in re.finditer(trait_pattern, code):
+        for match in _RUST_TRAIT_RE.finditer(code):
             result['traits'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Impl blocks
-        impl_pattern = r'impl(?:<[^>]+>)?\s+(?:(\w+)\s+for\s+)?(\w+)\s*\{'
-        for match in re.finditer(impl_pattern, code):
+        for match in _RUST_IMPL_RE.finditer(code):
             result['impls'].append({
                 'trait': match.group(1) if match.group(1) else None,
                 'type': match.group(2),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Use statements
-        use_pattern = r'use\s+([\w:]+(?:\s*as\s+\w+)?);'
-        for match in re.finditer(use_pattern, code):
+        for match in _RUST_USE_RE.finditer(code):
             result['uses'].append(match.group(1))
         
         return result
     
     # ==================== RUBY PARSER ====================
     
-    def _parse_ruby(self, code: str) -> Dict:
+    def _parse_ruby(self, code: str, lines: _LineIndex) -> Dict:
         """Ruby language parser"""
         result = {
             'functions': [],
@@ -653,40 +844,36 @@ class CodeParser:
         }
         
         # Method declarations
-        method_pattern = r'def\s+(?:self\.)?(\w+[?!]?)\s*(?:\([^)]*\))?'
-        for match in re.finditer(method_pattern, code):
+        for match in _RUBY_METHOD_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Class declarations
-        class_pattern = r'class\s+(\w+)(?:\s*<\s*(\w+))?'
-        for match in re.finditer(class_pattern, code):
+        for match in _RUBY_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'inherits': match.group(2) if match.group(2) else None
             })
         
         # Module declarations
-        module_pattern = r'module\s+(\w+)'
-        for match in re.finditer(module_pattern, code):
+        for match in _RUBY_MODULE_RE.finditer(code):
             result['modules'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Requires
-        require_pattern = r'require\s+[\'"]([^\'"]+)[\'"]'
-        for match in re.finditer(require_pattern, code):
+        for match in _RUBY_REQUIRE_RE.finditer(code):
             result['requires'].append(match.group(1))
         
         return result
     
     # ==================== PHP PARSER ====================
     
-    def _parse_php(self, code: str) -> Dict:
+    def _parse_php(self, code: str, lines: _LineIndex) -> Dict:
         """PHP language parser"""
         result = {
             'functions': [],
@@ -698,57 +885,51 @@ class CodeParser:
         }
         
         # Function declarations
-        func_pattern = r'function\s+(\w+)\s*\('
-        for match in re.finditer(func_pattern, code):
+        for match in _PHP_FUNC_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Class declarations
-        class_pattern = r'class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?\s*\{'
-        for match in re.finditer(class_pattern, code):
+        for match in _PHP_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'extends': match.group(2) if match.group(2) else None,
                 'implements': match.group(3) if match.group(3) else None
             })
         
         # Interface declarations
-        interface_pattern = r'interface\s+(\w+)\s*\{'
-        for match in re.finditer(interface_pattern, code):
+        for match in _PHP_INTERFACE_RE.finditer(code):
             result['interfaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Trait declarations
-        trait_pattern = r'trait\s+(\w+)\s*\{'
-        for match in re.finditer(trait_pattern, code):
+        for match in _PHP_TRAIT_RE.finditer(code):
             result['traits'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Namespaces
-        namespace_pattern = r'namespace\s+([\w\\]+);'
-        for match in re.finditer(namespace_pattern, code):
+        for match in _PHP_NAMESPACE_RE.finditer(code):
             result['namespaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Use statements
-        use_pattern = r'use\s+([\w\\]+)(?:\s+as\s+(\w+))?;'
-        for match in re.finditer(use_pattern, code):
+        for match in _PHP_USE_RE.finditer(code):
             result['uses'].append(match.group(1))
         
         return result
     
     # ==================== SWIFT PARSER ====================
     
-    def _parse_swift(self, code: str) -> Dict:
+    def _parse_swift(self, code: str, lines: _LineIndex) -> Dict:
         """Swift language parser"""
         result = {
             'functions': [],
@@ -760,56 +941,50 @@ class CodeParser:
         }
         
         # Function declarations
-        func_pattern = r'func\s+(\w+)(?:<[^>]+>)?\s*\('
-        for match in re.finditer(func_pattern, code):
+        for match in _SWIFT_FUNC_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Class declarations
-        class_pattern = r'class\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{'
-        for match in re.finditer(class_pattern, code):
+        for match in _SWIFT_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1,
+                'line': lines.line(match.start()),
                 'conforms': match.group(2).strip() if match.group(2) else None
             })
         
         # Struct declarations
-        struct_pattern = r'struct\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{'
-        for match in re.finditer(struct_pattern, code):
+        for match in _SWIFT_STRUCT_RE.finditer(code):
             result['structs'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Protocol declarations
-        protocol_pattern = r'protocol\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{'
-        for match in re.finditer(protocol_pattern, code):
+        for match in _SWIFT_PROTOCOL_RE.finditer(code):
             result['protocols'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Extension declarations
-        extension_pattern = r'extension\s+(\w+)(?:\s*:\s*([^{]+))?\s*\{'
-        for match in re.finditer(extension_pattern, code):
+        for match in _SWIFT_EXTENSION_RE.finditer(code):
             result['extensions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Imports
-        import_pattern = r'import\s+([\w.]+)'
-        for match in re.finditer(import_pattern, code):
+        for match in _SWIFT_IMPORT_RE.finditer(code):
             result['imports'].append(match.group(1))
         
         return result
     
     # ==================== KOTLIN PARSER ====================
     
-    def _parse_kotlin(self, code: str) -> Dict:
+    def _parse_kotlin(self, code: str, lines: _LineIndex) -> Dict:
         """Kotlin language parser"""
         result = {
             'functions': [],
@@ -821,57 +996,51 @@ class CodeParser:
         }
         
         # Function declarations
-        func_pattern = r'fun\s+(?:<[^>]+>\s+)?(\w+)\s*\('
-        for match in re.finditer(func_pattern, code):
+        for match in _KOTLIN_FUNC_RE.finditer(code):
             result['functions'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Data class declarations
-        data_class_pattern = r'data\s+class\s+(\w+)\s*\('
-        for match in re.finditer(data_class_pattern, code):
+        for match in _KOTLIN_DATA_CLASS_RE.finditer(code):
             result['data_classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Regular class declarations
-        class_pattern = r'(?:open|abstract)?\s*class\s+(\w+)(?:\s*:\s*([^{(]+))?\s*[{(]'
-        for match in re.finditer(class_pattern, code):
-            if 'data class' not in code[max(0, match.start()-10):match.start()]:
+        for match in _KOTLIN_CLASS_RE.finditer(code):
+            if not code[max(0, match.start() - 10):match.start()].rstrip().endswith('data'):
                 result['classes'].append({
                     'name': match.group(1),
-                    'line': code[:match.start()].count('\n') + 1,
+                    'line': lines.line(match.start()),
                     'inherits': match.group(2).strip() if match.group(2) else None
                 })
         
         # Interface declarations
-        interface_pattern = r'interface\s+(\w+)\s*\{'
-        for match in re.finditer(interface_pattern, code):
+        for match in _KOTLIN_INTERFACE_RE.finditer(code):
             result['interfaces'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Object declarations
-        object_pattern = r'object\s+(\w+)\s*[:{]'
-        for match in re.finditer(object_pattern, code):
+        for match in _KOTLIN_OBJECT_RE.finditer(code):
             result['objects'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Imports
-        import_pattern = r'import\s+([\w.]+)'
-        for match in re.finditer(import_pattern, code):
+        for match in _KOTLIN_IMPORT_RE.finditer(code):
             result['imports'].append(match.group(1))
         
         return result
     
     # ==================== GENERIC PARSER ====================
     
-    def _parse_generic(self, code: str) -> Dict:
+    def _parse_generic(self, code: str, lines: _LineIndex) -> Dict:
         """Generic parsing for unknown languages"""
         result = {
             'functions': [],
@@ -882,26 +1051,20 @@ class CodeParser:
         logger.info("⚠️ Using generic parser - may have limited accuracy")
         
         # Try to find function-like patterns
-        func_patterns = [
-            r'(?:def|function|func|fn|sub|procedure)\s+(\w+)',
-            r'(\w+)\s*\([^)]*\)\s*[{:]',
-        ]
-        
-        for pattern in func_patterns:
-            for match in re.finditer(pattern, code):
+        for pattern in _GENERIC_FUNC_RES:
+            for match in pattern.finditer(code):
                 func_name = match.group(1)
                 if len(func_name) > 2 and func_name not in ['if', 'for', 'while', 'return']:
                     result['functions'].append({
                         'name': func_name,
-                        'line': code[:match.start()].count('\n') + 1
+                        'line': lines.line(match.start())
                     })
         
         # Try to find class-like patterns
-        class_pattern = r'(?:class|struct|interface|type|record)\s+(\w+)'
-        for match in re.finditer(class_pattern, code):
+        for match in _GENERIC_CLASS_RE.finditer(code):
             result['classes'].append({
                 'name': match.group(1),
-                'line': code[:match.start()].count('\n') + 1
+                'line': lines.line(match.start())
             })
         
         # Deduplicate
@@ -981,4 +1144,19 @@ class CodeParser:
         if parsed_data.get('structs'):
             summary_parts.append(f"Structs: {len(parsed_data['structs'])}")
         
-        return " | ".join(summary_parts)
\ No newline at end of file
+        return " | ".join(summary_parts)
+
+# One parser per worker process, built on first use
+_worker_parser = None
+
+
+def parse_code_bytes(data: bytes, filename: str) -> Dict:
+    """
+    Decode and parse raw source bytes with a per-process CodeParser.
+
+    Module-level so ProcessPoolExecutor can pickle it by reference.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = CodeParser()
+    return _worker_parser.parse_code(decode_source(data), filename)
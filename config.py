@@ -21,10 +21,14 @@ class Config:
     LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "8000"))
-    
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))  # Parallel LLM requests
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # Seconds per request attempt
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
     # File handling
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "1000000"))  # 1MB
     MAX_FILES_PER_REQUEST = int(os.getenv("MAX_FILES_PER_REQUEST", "50"))
+    PARSE_CACHE_MAX_FILES = int(os.getenv("PARSE_CACHE_MAX_FILES", "5000"))  # Parse results kept on disk
     SUPPORTED_EXTENSIONS = [
         '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c',
         '.cs', '.go', '.rb', '.php', '.swift', '.kt', '.rs', '.scala'
@@ -38,6 +42,7 @@ class Config:
     # RAG configuration
     RAG_MAX_RESULTS = int(os.getenv("RAG_MAX_RESULTS", "3"))
     RAG_SIMILARITY_THRESHOLD = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.1"))
+    RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
     
     # Test generation settings
     DEFAULT_TEST_TYPES = ["Unit Test", "Regression Test", "Functional Test"]
@@ -45,6 +50,9 @@ class Config:
     REGRESSION_TESTS_PER_CHANGE = int(os.getenv("REGRESSION_TESTS_PER_CHANGE", "3"))
     FUNCTIONAL_TESTS_PER_MODULE = int(os.getenv("FUNCTIONAL_TESTS_PER_MODULE", "5"))
     
+    # Chat settings
+    CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "200"))  # Messages kept in session
+    
     # Security settings
     MAX_INPUT_LENGTH = int(os.getenv("MAX_INPUT_LENGTH", "10000"))
     RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
@@ -54,6 +62,7 @@ class Config:
     # Storage paths
     BASE_DIR = Path(__file__).parent
     STORAGE_DIR = BASE_DIR / "storage"
+    PARSE_CACHE_DIR = STORAGE_DIR / "ast_cache"  # JSON parse results by content hash
     CHAT_HISTORY_DIR = BASE_DIR / "chat_history"
     RAG_STORAGE_DIR = BASE_DIR / "rag_storage"
     TEST_OUTPUT_DIR = BASE_DIR / "test_outputs"
@@ -66,6 +75,7 @@ class Config:
         """Create necessary directories"""
         for dir_path in [
             cls.STORAGE_DIR,
+            cls.PARSE_CACHE_DIR,
             cls.CHAT_HISTORY_DIR,
             cls.RAG_STORAGE_DIR,
             cls.TEST_OUTPUT_DIR,
@@ -7,12 +7,28 @@ import tempfile
 import json
 from datetime import datetime
 from logger import get_app_logger
+from code_parser import decode_source, read_source
 
 logger = get_app_logger("git_handler")
 
+
+def _suffix(name: str) -> str:
+    """Lower-cased extension of a '/'-separated path, as Path.suffix gives it"""
+    name = name.rpartition('/')[2]
+    i = name.rfind('.')
+    return name[i:].lower() if 0 < i < len(name) - 1 else ''
+
+
 class GitHandler:
     """Handle Git repository operations with diff detection and incremental testing"""
     
+    # Supported code file extensions
+    CODE_EXTENSIONS = frozenset({
+        '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c',
+        '.cs', '.go', '.rb', '.php', '.swift', '.kt', '.rs', '.scala',
+        '.r', '.m', '.h', '.hpp'
+    })
+    
     def __init__(self):
         self.repos_dir = Path("temp_repos")
         self.repos_dir.mkdir(exist_ok=True)
@@ -20,13 +36,6 @@ class GitHandler:
         # Store for tracking repository states
         self.repo_states_file = self.repos_dir / "repo_states.json"
         self.repo_states = self._load_repo_states()
-        
-        # Supported code file extensions
-        self.code_extensions = {
-            '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c',
-            '.cs', '.go', '.rb', '.php', '.swift', '.kt', '.rs', '.scala',
-            '.r', '.m', '.h', '.hpp'
-        }
     
     def clone_or_pull_repository(
         self,
@@ -177,9 +186,11 @@ class GitHandler:
         code_files = []
         
         for file_path in changed_files:
+            if _suffix(file_path) not in self.CODE_EXTENSIONS:
+                continue
             full_path = repo_path / file_path
             
-            if full_path.exists() and full_path.suffix.lower() in self.code_extensions:
+            if full_path.exists():
                 # Skip very large files (> 1MB)
                 if full_path.stat().st_size < 1_000_000:
                     code_files.append(full_path)
@@ -243,7 +254,7 @@ class GitHandler:
                     status, filepath = parts
                     
                     # Only include code files
-                    if Path(filepath).suffix.lower() in self.code_extensions:
+                    if _suffix(filepath) in self.CODE_EXTENSIONS:
                         diff_info['changed_files'].append(filepath)
                         
                         if status == 'A':
@@ -280,6 +291,16 @@ class GitHandler:
             'modified_functions': {}
         }
         
+        # Previous versions of all files from one git process
+        try:
+            old_sources = self._read_blobs(repo_path, 'HEAD~1', modified_files)
+        except subprocess.TimeoutExpired:
+            logger.warning("⚠️ Timeout getting old versions of modified files")
+            old_sources = None
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"⚠️ Could not read old versions of modified files: {e}")
+            old_sources = None
+        
         for file_path in modified_files:
             try:
                 # Get current version
@@ -287,11 +308,8 @@ class GitHandler:
                 if not current_file.exists():
                     continue
                     
-                with open(current_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    current_code = f.read()
-                
                 # Parse current version to get functions
-                current_parsed = parser.parse_code(current_code, current_file.name)
+                current_parsed = parser.parse_file(current_file)
                 current_functions = {}
                 for chunk in current_parsed.get('chunks', []):
                     if chunk.get('type') == 'function':
@@ -299,65 +317,108 @@ class GitHandler:
                         if func_name:
                             current_functions[func_name] = chunk.get('code', '')
                 
-                # Try to get previous version from git
-                try:
-                    old_code = subprocess.check_output(
-                        ['git', 'show', f'HEAD~1:{file_path}'],
-                        cwd=repo_path,
-                        stderr=subprocess.DEVNULL,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    # Parse old version to get functions
-                    old_parsed = parser.parse_code(old_code, Path(file_path).name)
-                    old_functions = {}
-                    for chunk in old_parsed.get('chunks', []):
-                        if chunk.get('type') == 'function':
-                            func_name = chunk.get('name', '')
-                            if func_name:
-                                old_functions[func_name] = chunk.get('code', '')
-                    
-                    # Calculate changes
-                    old_func_names = set(old_functions.keys())
-                    current_func_names = set(current_functions.keys())
-                    
-                    # Added functions
-                    added = current_func_names - old_func_names
-                    if added:
-                        result['added_functions'][current_file.name] = list(added)
-                        logger.info(f"➕ Added functions in {current_file.name}: {added}")
-                    
-                    # Removed functions
-                    removed = old_func_names - current_func_names
-                    if removed:
-                        result['removed_functions'][current_file.name] = list(removed)
-                        logger.info(f"🗑️ Removed functions in {current_file.name}: {removed}")
-                    
-                    # Modified functions (exist in both but code changed)
-                    common = old_func_names & current_func_names
-                    modified = []
-                    for func_name in common:
-                        if old_functions[func_name] != current_functions[func_name]:
-                            modified.append(func_name)
-                    
-                    if modified:
-                        result['modified_functions'][current_file.name] = modified
-                        logger.info(f"✏️ Modified functions in {current_file.name}: {modified}")
-                        
-                except subprocess.CalledProcessError:
+                if old_sources is None:
+                    continue
+                
+                old_code = old_sources.get(file_path)
+                if old_code is None:
                     # File is new (no previous version) - all functions are "added"
                     if current_functions:
                         result['added_functions'][current_file.name] = list(current_functions.keys())
                         logger.info(f"➕ New file with functions: {current_file.name}")
-                except subprocess.TimeoutExpired:
-                    logger.warning(f"⚠️ Timeout getting old version of {file_path}")
+                    continue
+                
+                # Parse old version to get functions
+                old_parsed = parser.parse_code(old_code, Path(file_path).name)
+                old_functions = {}
+                for chunk in old_parsed.get('chunks', []):
+                    if chunk.get('type') == 'function':
+                        func_name = chunk.get('name', '')
+                        if func_name:
+                            old_functions[func_name] = chunk.get('code', '')
+                
+                # Calculate changes
+                old_func_names = set(old_functions.keys())
+                current_func_names = set(current_functions.keys())
+                
+                # Added functions
+                added = current_func_names - old_func_names
+                if added:
+                    result['added_functions'][current_file.name] = list(added)
+                    logger.info(f"➕ Added functions in {current_file.name}: {added}")
+                
+                # Removed functions
+                removed = old_func_names - current_func_names
+                if removed:
+                    result['removed_functions'][current_file.name] = list(removed)
+                    logger.info(f"🗑️ Removed functions in {current_file.name}: {removed}")
+                
+                # Modified functions (exist in both but code changed)
+                common = old_func_names & current_func_names
+                modified = []
+                for func_name in common:
+                    if old_functions[func_name] != current_functions[func_name]:
+                        modified.append(func_name)
+                
+                if modified:
+                    result['modified_functions'][current_file.name] = modified
+                    logger.info(f"✏️ Modified functions in {current_file.name}: {modified}")
                     
             except Exception as e:
                 logger.warning(f"⚠️ Error detecting function changes in {file_path}: {e}")
         
         return result
     
+    def _read_blobs(self, repo_path, rev: str, file_paths: List[str], timeout: int = 30) -> Dict[str, str]:
+        """
+        Read several files at a revision through a single `git cat-file --batch`
+        
+        Args:
+            repo_path: Path to the git repository
+            rev: Revision to read from (e.g. 'HEAD~1')
+            file_paths: File paths relative to the repository root
+            timeout: Seconds to wait for git
+            
+        Returns:
+            Dictionary of file path -> decoded content; paths missing at `rev` are omitted
+            
+        Raises:
+            subprocess.CalledProcessError: If git exits with an error
+        """
+        if not file_paths:
+            return {}
+        
+        requests = "".join(f"{rev}:{file_path}\n" for file_path in file_paths).encode()
+        proc = subprocess.run(
+            ['git', 'cat-file', '--batch=%(objecttype) %(objectsize)'],
+            cwd=repo_path,
+            input=requests,
+            capture_output=True,
+            timeout=timeout
+        )
+        proc.check_returncode()
+        
+        # Each reply is "<type> <size>\n<content>\n", or "<spec> missing\n" where
+        # the spec may itself contain spaces (e.g. a newly added "my file.py")
+        out = proc.stdout
+        blobs = {}
+        pos = 0
+        for file_path in file_paths:
+            eol = out.find(b"\n", pos)
+            if eol < 0:
+                break
+            header = out[pos:eol]
+            pos = eol + 1
+            if header.endswith((b" missing", b" ambiguous")):
+                continue
+            object_type, _, size = header.partition(b" ")
+            size = int(size)
+            if object_type == b"blob":
+                blobs[file_path] = decode_source(out[pos:pos + size])
+            pos += size + 1
+        
+        return blobs
+    
     def _load_repo_states(self) -> Dict:
         """Load repository states from disk"""
         if self.repo_states_file.exists():
@@ -413,10 +474,21 @@ class GitHandler:
         repo_path, _ = self.clone_or_pull_repository(repo_url, branch, depth)
         return repo_path
     
+    # Common dependency/build directories that never hold code under test
+    EXCLUDE_DIRS = frozenset({
+        '.git', 'node_modules', 'venv', '.venv', 'env',
+        '__pycache__', 'dist', 'build', 'target', '.idea',
+        'vendor', 'deps', '.next'
+    })
+    
     def get_code_files(self, repo_path: Path, max_files: int = 100) -> List[Path]:
         """
         Get all code files from repository
         
+        Tracked files and their sizes come from one `git ls-tree` call instead
+        of a directory walk plus a stat per file; non-git directories fall
+        back to walking the tree.
+        
         Args:
             repo_path: Path to repository
             max_files: Maximum number of files to return
@@ -424,24 +496,21 @@ class GitHandler:
         Returns:
             List of code file paths
         """
-        code_files = []
+        try:
+            return self._list_code_blobs(Path(repo_path), max_files)
+        except (subprocess.SubprocessError, OSError, ValueError) as e:
+            logger.warning(f"⚠️ git ls-tree failed ({e}), walking {repo_path} instead")
         
-        # Exclude common directories
-        exclude_dirs = {
-            '.git', 'node_modules', 'venv', '.venv', 'env',
-            '__pycache__', 'dist', 'build', 'target', '.idea',
-            'vendor', 'deps', '.next'
-        }
+        code_files = []
         
         for root, dirs, files in os.walk(repo_path):
             # Filter out excluded directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+            dirs[:] = [d for d in dirs if d not in self.EXCLUDE_DIRS]
             
             for file in files:
-                file_path = Path(root) / file
-                
                 # Check if it's a code file
-                if file_path.suffix.lower() in self.code_extensions:
+                if _suffix(file) in self.CODE_EXTENSIONS:
+                    file_path = Path(root) / file
                     # Skip very large files (> 1MB)
                     if file_path.stat().st_size < 1_000_000:
                         code_files.append(file_path)
@@ -451,6 +520,42 @@ class GitHandler:
         
         return code_files
     
+    def _list_code_blobs(self, repo_path: Path, max_files: int) -> List[Path]:
+        """Code files tracked at HEAD, filtered by extension, directory and size"""
+        result = subprocess.run(
+            ['git', 'ls-tree', '-r', '-l', '-z', 'HEAD'],
+            cwd=repo_path,
+            capture_output=True,
+            check=True,
+            timeout=60
+        )
+        
+        code_files = []
+        # Entries are "<mode> <type> <object> <size>\t<path>\0"
+        for entry in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+            if not entry:
+                continue
+            meta, _, rel_path = entry.partition('\t')
+            mode, obj_type, _, size = meta.split()
+            # Regular files only (no symlinks or submodules)
+            if obj_type != 'blob' or mode not in ('100644', '100755'):
+                continue
+            
+            parts = rel_path.split('/')
+            if _suffix(parts[-1]) not in self.CODE_EXTENSIONS:
+                continue
+            if not self.EXCLUDE_DIRS.isdisjoint(parts[:-1]):
+                continue
+            # Skip very large files (> 1MB)
+            if int(size) >= 1_000_000:
+                continue
+            
+            code_files.append(repo_path / rel_path)
+            if len(code_files) >= max_files:
+                break
+        
+        return code_files
+    
     def get_repo_structure(self, repo_path: Path) -> dict:
         """Get repository structure information"""
         structure = {
@@ -483,9 +588,9 @@ class GitHandler:
                 structure['total_files'] += len(files)
                 
                 for file in files:
-                    ext = Path(file).suffix.lower()
+                    ext = _suffix(file)
                     
-                    if ext in self.code_extensions:
+                    if ext in self.CODE_EXTENSIONS:
                         structure['code_files'] += 1
                         structure['file_types'][ext] = structure['file_types'].get(ext, 0) + 1
                         
@@ -520,8 +625,7 @@ class GitHandler:
             File content or None if error
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+            return read_source(file_path)
         except Exception:
             return None
     
@@ -2,7 +2,10 @@
 LLM Handler with Google LLM API integration
 """
 import os
-from typing import List, Dict, Optional
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Iterator, List, Dict, Optional
 import json
 import time
 import google.generativeai as genai
@@ -11,6 +14,42 @@ from config import config
 
 logger = get_app_logger("llm_handler")
 
+# The handler is cached across sessions and its grpc_asyncio client binds to
+# the first event loop it runs on, so all async LLM work shares one loop
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return the event loop running in a daemon thread"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return _loop
+
+
+def submit_coroutine(coro: Coroutine) -> concurrent.futures.Future:
+    """Schedule a coroutine on the shared LLM event loop"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop())
+
+
+def run_coroutine(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared LLM event loop and wait for its result
+    
+    Raises:
+        concurrent.futures.TimeoutError: If it does not finish within timeout
+            (the coroutine is cancelled)
+    """
+    future = submit_coroutine(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
 class LLMHandler:
     """Handler for LLM interactions using Google LLM"""
     
@@ -18,6 +57,8 @@ class LLMHandler:
         """Initialize LLM handler with LLM"""
         self.api_key = config.LLM_API_KEY
         self.model_name = config.LLM_MODEL
+        self.request_timeout = config.LLM_TIMEOUT
+        self.max_retries = max(1, config.LLM_MAX_RETRIES)
         
         if not self.api_key:
             logger.error("LLM API key not found!")
@@ -83,15 +124,30 @@ Test case requirements:
 
 
 
-    def _make_request(self, prompt: str, context: str = "", max_retries: int = 3) -> str:
-        """Make request to LLM API with retry logic"""
-        
+    def _build_full_prompt(self, prompt: str, context: str = "") -> str:
+        """Combine system prompt, optional context and user request"""
         full_prompt = f"{self.system_prompt}\n\n"
         
         if context:
             full_prompt += f"CONTEXT:\n{context}\n\n"
         
         full_prompt += f"USER REQUEST:\n{prompt}\n\nRESPONSE:"
+        return full_prompt
+    
+    def _make_request(self, prompt: str, context: str = "", max_retries: Optional[int] = None) -> str:
+        """Make request to LLM API with timeout and retry logic"""
+        return run_coroutine(self._make_request_async(prompt, context, max_retries))
+    
+    async def _make_request_async(
+        self,
+        prompt: str,
+        context: str = "",
+        max_retries: Optional[int] = None
+    ) -> str:
+        """Async request with per-attempt timeout and exponential backoff"""
+        
+        full_prompt = self._build_full_prompt(prompt, context)
+        max_retries = max_retries or self.max_retries
         
         logger.info(f"📤 Making LLM API request...")
         logger.debug(f"Prompt length: {len(full_prompt)} characters")
@@ -102,7 +158,10 @@ Test case requirements:
             try:
                 start_time = time.time()
                 
-                response = self.model.generate_content(full_prompt)
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(full_prompt),
+                    timeout=self.request_timeout
+                )
                 
                 elapsed = time.time() - start_time
                 
@@ -113,10 +172,23 @@ Test case requirements:
                 else:
                     logger.warning(f"⚠️ Empty response from LLM (attempt {attempt + 1})")
                     if attempt < max_retries - 1:
-                        time.sleep(retry_delay)
+                        await asyncio.sleep(retry_delay)
                         retry_delay *= 2
                         continue
                     return "Error: Empty response from LLM"
+            
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"⏱️ LLM request timed out after {self.request_timeout:.0f}s "
+                    f"(attempt {attempt + 1}/{max_retries})"
+                )
+                
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay)
+                    retry_delay *= 2
+                    continue
+                
+                return f"Error: Request timed out after {self.request_timeout:.0f}s"
                     
             except Exception as e:
                 logger.error(f"❌ LLM API error (attempt {attempt + 1}/{max_retries}): {str(e)}")
@@ -127,7 +199,7 @@ Test case requirements:
                     return "Error: Invalid API key. Please check your LLM_API_KEY."
                 
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay)
                     retry_delay *= 2
                     continue
                 
@@ -145,25 +217,58 @@ Test case requirements:
         
         logger.info(f"🔧 Generating {test_type} for chunk: {chunk['name']} ({chunk['type']})")
         
+        prompt = self._build_chunk_prompt(chunk, test_type)
+        response = self._make_request(prompt)
+        
+        return self._process_chunk_response(response, chunk, test_type, file_name)
+    
+    async def agenerate_tests_for_chunk(
+        self,
+        chunk: Dict,
+        test_type: str,
+        file_name: str = ""
+    ) -> List[Dict]:
+        """Async variant of generate_tests_for_chunk"""
+        
+        logger.info(f"🔧 Generating {test_type} for chunk: {chunk['name']} ({chunk['type']})")
+        
+        prompt = self._build_chunk_prompt(chunk, test_type)
+        response = await self._make_request_async(prompt)
+        
+        return self._process_chunk_response(response, chunk, test_type, file_name)
+    
+    def _build_chunk_prompt(self, chunk: Dict, test_type: str) -> str:
+        """Build prompt based on test type"""
         chunk_code = chunk['code']
         chunk_name = chunk['name']
         chunk_type = chunk['type']
         
-        # Build prompt based on test type
         if test_type == "Unit Test":
-            prompt = self._build_unit_test_prompt(chunk_code, chunk_name, chunk_type)
+            return self._build_unit_test_prompt(chunk_code, chunk_name, chunk_type)
         elif test_type == "Functional Test":
-            prompt = self._build_functional_test_prompt(chunk_code, chunk_name, chunk_type)
+            return self._build_functional_test_prompt(chunk_code, chunk_name, chunk_type)
         # elif test_type == "Regression Test":
-        #     prompt = self._build_regression_test_prompt(chunk_code, chunk_name, chunk_type)
+        #     return self._build_regression_test_prompt(chunk_code, chunk_name, chunk_type)
         else:
-            prompt = self._build_generic_test_prompt(chunk_code, chunk_name, test_type)
-        
-        response = self._make_request(prompt)
+            return self._build_generic_test_prompt(chunk_code, chunk_name, test_type)
+    
+    def _process_chunk_response(
+        self,
+        response: str,
+        chunk: Dict,
+        test_type: str,
+        file_name: str
+    ) -> List[Dict]:
+        """Parse LLM response for a chunk and attach chunk metadata"""
+        chunk_name = chunk['name']
+        chunk_type = chunk['type']
         
         if response.startswith("Error:"):
             logger.error(f"❌ LLM error for {chunk_name}: {response}")
-            return self._generate_fallback_tests(chunk, test_type, file_name)
+            fallback_tests = self._generate_fallback_tests(chunk, test_type, file_name)
+            for test in fallback_tests:
+                test['error'] = response
+            return fallback_tests
         
         tests = self._parse_test_response(response, test_type)
         
@@ -425,6 +530,92 @@ Return ONLY JSON array:
         
         logger.info(f"💬 Generating chat response for: {user_message[:50]}...")
         
+        prompt = self._build_chat_prompt(user_message, context, chat_history)
+        
+        # Make the request to the model
+        response = self._make_request(prompt)
+        logger.info(f"✅ Chat response generated ({len(response)} chars)")
+        
+        return response
+    
+    def stream_chat_response(
+        self,
+        user_message: str,
+        context: str = "",
+        chat_history: List[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Generate a chat response incrementally
+        
+        Yields text fragments as the model produces them; each fragment must
+        arrive within the request timeout. If the stream fails before anything
+        was yielded, falls back to the retrying non-streaming request; a
+        failure mid-stream ends the reply with an error note.
+        
+        Args:
+            user_message: Sanitized user message
+            context: Retrieved RAG context
+            chat_history: Previous chat messages
+            
+        Yields:
+            Response text fragments
+        """
+        logger.info(f"💬 Streaming chat response for: {user_message[:50]}...")
+        
+        prompt = self._build_chat_prompt(user_message, context, chat_history)
+        full_prompt = self._build_full_prompt(prompt)
+        
+        total = 0
+        try:
+            # The pinned client takes no per-request timeout, so every step
+            # of the async stream is awaited with one instead
+            chunks = run_coroutine(self._open_stream(full_prompt), self.request_timeout)
+            while True:
+                chunk = run_coroutine(self._next_chunk(chunks), self.request_timeout)
+                if chunk is None:
+                    break
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk without text parts (e.g. safety-filtered)
+                    continue
+                if text:
+                    total += len(text)
+                    yield text
+        except Exception as e:
+            reason = f"no response within {self.request_timeout:.0f}s" if isinstance(
+                e, concurrent.futures.TimeoutError
+            ) else e
+            if not total:
+                logger.warning(f"⚠️ Streaming failed ({reason}), retrying without streaming")
+                yield self._make_request(prompt)
+                return
+            logger.error(f"❌ Stream interrupted after {total} chars: {reason}")
+            yield f"\n\nError: Response interrupted ({reason})"
+            return
+        
+        logger.info(f"✅ Chat response streamed ({total} chars)")
+    
+    async def _open_stream(self, full_prompt: str):
+        """Start a streaming request and return its async chunk iterator"""
+        response = await self.model.generate_content_async(full_prompt, stream=True)
+        return response.__aiter__()
+    
+    async def _next_chunk(self, chunks):
+        """Next chunk of a stream, or None when it is exhausted"""
+        try:
+            return await chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+    
+    def _build_chat_prompt(
+        self,
+        user_message: str,
+        context: str = "",
+        chat_history: List[Dict] = None
+    ) -> str:
+        """Build the chat prompt from recent history, context and the question"""
+        
         # Build conversation context
         history_text = ""
         if chat_history:
@@ -434,7 +625,7 @@ Return ONLY JSON array:
             ])
         
         # Updated system prompt to request plain text output
-        prompt = f"""You are a helpful AI assistant for test case generation.
+        return f"""You are a helpful AI assistant for test case generation.
 
     Previous conversation:
     {history_text}
@@ -446,9 +637,3 @@ Return ONLY JSON array:
 
     Provide a clear, helpful response focused on test case generation, code analysis, or testing strategies.
     Respond in plain text, without using structured formats like JSON, unless specifically requested."""
-        
-        # Make the request to the model
-        response = self._make_request(prompt)
-        logger.info(f"✅ Chat response generated ({len(response)} chars)")
-        
-        return response
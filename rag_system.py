@@ -1,9 +1,34 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import json
+import heapq
+from array import array
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 import hashlib
 
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+    'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was',
+    'are', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should'
+})
+
+
+@lru_cache(maxsize=256)
+def _query_keywords(text: str) -> Tuple[Tuple[str, int], ...]:
+    """Keyword counts for a query (cached, as chat queries repeat often)"""
+    keywords = {}
+    
+    for word in text.lower().split():
+        word = ''.join(c for c in word if c.isalnum() or c == '_')
+        
+        if word and word not in _STOP_WORDS and len(word) > 2:
+            keywords[word] = keywords.get(word, 0) + 1
+    
+    return tuple(keywords.items())
+
+
 class RAGSystem:
     """Enhanced RAG system for code context retrieval with test case storage"""
     
@@ -16,32 +41,58 @@ class RAGSystem:
         self.embeddings = {}
         self.metadata = {}
         
+        # keyword -> (doc_ids, packed weights), rebuilt lazily after embeddings change
+        self._keyword_index = None
+        
         # NEW: Storage for test cases
         self.test_cases_storage = {}
         self.test_summaries = {}
         
+        # Set when documents were added with persist=False and not yet saved
+        self._unsaved = False
+        
         # Load existing data
         self._load_storage()
     
-    def add_test_cases(self, test_cases: Dict[str, List[Dict]], session_id: str = "current"):
+    def add_test_cases(
+        self,
+        test_cases: Dict[str, List[Dict]],
+        session_id: str = "current",
+        persist: bool = True
+    ):
         """
         Add generated test cases to RAG for context-aware queries
         
         Args:
             test_cases: Dictionary of test cases by type
             session_id: Identifier for this test generation session
+            persist: Write storage to disk now (False when batching with other adds)
         """
+        fingerprint = hashlib.md5(
+            json.dumps(test_cases, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        # Same tests as last time: summary and index are already up to date
+        if self.test_cases_storage.get(session_id, {}).get('fingerprint') == fingerprint:
+            if persist and self._unsaved:
+                self._save_storage()
+            return
+        
         self.test_cases_storage[session_id] = {
             'test_cases': test_cases,
             'timestamp': datetime.now().isoformat(),
-            'summary': self._generate_test_summary(test_cases)
+            'summary': self._generate_test_summary(test_cases),
+            'fingerprint': fingerprint
         }
         
         # Create embeddings for test queries
         self._index_test_cases(test_cases, session_id)
         
         # Save to disk
-        self._save_storage()
+        if persist:
+            self._save_storage()
+        else:
+            self._unsaved = True
     
     def _generate_test_summary(self, test_cases: Dict[str, List[Dict]]) -> Dict:
         """Generate detailed summary of test cases including edge cases"""
@@ -172,6 +223,7 @@ class RAGSystem:
             'imports': [],
             'filename': 'test_cases'
         })
+        self._keyword_index = None
     
     def get_test_context(self, query: str, session_id: str = "current") -> str:
         """
@@ -274,16 +326,23 @@ class RAGSystem:
         
         return "\n".join(context_parts)
     
-    def add_code_documents(self, parsed_data: Dict[str, Dict]):
+    def add_code_documents(self, parsed_data: Dict[str, Dict], persist: bool = True):
         """
         Add code documents to RAG system
         
         Args:
             parsed_data: Dictionary of parsed code files
+            persist: Write storage to disk now (False when batching with other adds)
         """
+        added = 0
         for filename, data in parsed_data.items():
             doc_id = self._generate_doc_id(filename, data['code'])
             
+            # doc_id hashes the content, so an unchanged file is already indexed
+            if doc_id in self.code_documents:
+                continue
+            added += 1
+            
             # Store document
             self.code_documents[doc_id] = {
                 'filename': filename,
@@ -308,8 +367,16 @@ class RAGSystem:
                 'loc': data.get('lines_of_code', 0)
             }
         
+        if not added:
+            return
+        
+        self._keyword_index = None
+        
         # Persist to disk
-        self._save_storage()
+        if persist:
+            self._save_storage()
+        else:
+            self._unsaved = True
     
     def get_relevant_context(
         self,
@@ -334,7 +401,8 @@ class RAGSystem:
             'coverage', 'case', 'generated', 'what tests'
         ]
         
-        if any(keyword in query.lower() for keyword in test_keywords):
+        query_lower = query.lower()
+        if any(keyword in query_lower for keyword in test_keywords):
             # Get test context
             test_context = self.get_test_context(query, session_id)
             return test_context
@@ -343,21 +411,20 @@ class RAGSystem:
         if not self.code_documents:
             return "No code context available."
         
-        # Simple keyword matching
-        query_keywords = self._extract_keywords(query.lower())
+        # Score only documents sharing at least one query keyword
+        if self._keyword_index is None:
+            self._keyword_index = self._build_keyword_index()
         
-        # Score documents
         scores = {}
-        for doc_id, embedding in self.embeddings.items():
-            score = self._calculate_similarity(query_keywords, embedding)
-            scores[doc_id] = score
+        for keyword, query_weight in _query_keywords(query_lower):
+            if keyword not in self._keyword_index:
+                continue
+            doc_ids, weights = self._keyword_index[keyword]
+            for doc_id, doc_weight in zip(doc_ids, weights):
+                scores[doc_id] = scores.get(doc_id, 0) + query_weight * doc_weight
         
-        # Get top results
-        sorted_docs = sorted(
-            scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:max_results]
+        # Get top results without sorting every document
+        sorted_docs = heapq.nlargest(max_results, scores.items(), key=lambda x: x[1])
         
         # Format context
         context_parts = []
@@ -487,39 +554,22 @@ class RAGSystem:
         
         return keywords
     
-    def _extract_keywords(self, text: str) -> Dict[str, int]:
-        """Extract keywords from text"""
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
-            'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was',
-            'are', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
-            'do', 'does', 'did', 'will', 'would', 'could', 'should'
-        }
-        
-        words = text.lower().split()
-        keywords = {}
-        
-        for word in words:
-            word = ''.join(c for c in word if c.isalnum() or c == '_')
-            
-            if word and word not in stop_words and len(word) > 2:
-                keywords[word] = keywords.get(word, 0) + 1
-        
-        return keywords
-    
-    def _calculate_similarity(
-        self,
-        query_keywords: Dict[str, int],
-        doc_embedding: Dict[str, int]
-    ) -> float:
-        """Calculate simple similarity score"""
-        score = 0.0
+    def _build_keyword_index(self) -> Dict[str, Tuple[Tuple[str, ...], array]]:
+        """
+        Invert document embeddings into keyword -> (doc_ids, weights)
         
-        for keyword, query_weight in query_keywords.items():
-            if keyword in doc_embedding:
-                score += query_weight * doc_embedding[keyword]
+        Weights are stored as unsigned 8-bit values (saturating at 255) in a
+        packed array, one byte per posting instead of a dict entry per doc.
+        """
+        postings = {}
+        for doc_id, embedding in self.embeddings.items():
+            for keyword, weight in embedding.items():
+                postings.setdefault(keyword, []).append((doc_id, min(int(weight), 255)))
         
-        return score
+        return {
+            keyword: (tuple(doc_id for doc_id, _ in entries), array('B', (w for _, w in entries)))
+            for keyword, entries in postings.items()
+        }
     
     def _save_storage(self):
         """Save RAG data to disk"""
@@ -535,6 +585,7 @@ class RAGSystem:
         
         with open(storage_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
+        self._unsaved = False
     
     def _load_storage(self):
         """Load RAG data from disk"""
@@ -550,6 +601,7 @@ class RAGSystem:
                 self.metadata = data.get('metadata', {})
                 self.test_cases_storage = data.get('test_cases_storage', {})
                 self.test_summaries = data.get('test_summaries', {})
+                self._keyword_index = None
             except Exception:
                 pass
     
@@ -560,4 +612,5 @@ class RAGSystem:
         self.metadata = {}
         self.test_cases_storage = {}
         self.test_summaries = {}
+        self._keyword_index = None
         self._save_storage()
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Semantic response cache for chat replies
+"""
+import hashlib
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+from logger import get_app_logger
+
+logger = get_app_logger("response_cache")
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class ResponseCache:
+    """Reuse chat responses for near-identical prompts asked over the same context"""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256):
+        """
+        Initialize response cache
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum cached responses per context
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        # context hash -> [(prompt vector, vector norm, response)]
+        self.entries: Dict[str, List[Tuple[Dict[str, int], float, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt: str, context: str = "", threshold: Optional[float] = None) -> Optional[str]:
+        """
+        Find a cached response for a similar prompt
+
+        Args:
+            prompt: Sanitized user prompt
+            context: Retrieved context the response was generated with
+            threshold: Optional override of the similarity threshold
+
+        Returns:
+            Cached response or None on miss
+        """
+        threshold = self.threshold if threshold is None else threshold
+        vector, norm = self._vectorize(prompt)
+
+        best_score = 0.0
+        best_response = None
+
+        if norm:
+            for cached_vector, cached_norm, response in self.entries.get(self._context_key(context), []):
+                score = self._cosine(vector, norm, cached_vector, cached_norm)
+                if score > best_score:
+                    best_score = score
+                    best_response = response
+
+        if best_response is not None and best_score >= threshold:
+            self.hits += 1
+            logger.info(f"⚡ Response cache hit (similarity {best_score:.2f})")
+            return best_response
+
+        self.misses += 1
+        return None
+
+    def store(self, prompt: str, context: str, response: str) -> None:
+        """Cache a response (error responses are never cached)"""
+        if not response or response.startswith("Error:") or "\n\nError: " in response:
+            # Failed or interrupted (partially streamed) replies
+            return
+
+        vector, norm = self._vectorize(prompt)
+        if not norm:
+            return
+
+        bucket = self.entries.setdefault(self._context_key(context), [])
+        bucket.append((vector, norm, response))
+
+        # Drop oldest entries beyond the limit
+        if len(bucket) > self.max_entries:
+            del bucket[:len(bucket) - self.max_entries]
+
+    def clear(self) -> None:
+        """Invalidate all cached responses"""
+        self.entries = {}
+        logger.info("🧹 Response cache cleared")
+
+    def get_statistics(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            'contexts': len(self.entries),
+            'entries': sum(len(bucket) for bucket in self.entries.values()),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def _context_key(self, context: str) -> str:
+        """Hash the context so responses are only reused for the same code/tests"""
+        return hashlib.md5((context or "").encode()).hexdigest()
+
+    def _vectorize(self, text: str) -> Tuple[Dict[str, int], float]:
+        """Bag-of-words vector and its L2 norm"""
+        vector = {}
+        for token in _TOKEN_RE.findall(text.lower()):
+            vector[token] = vector.get(token, 0) + 1
+
+        norm = math.sqrt(sum(count * count for count in vector.values()))
+        return vector, norm
+
+    def _cosine(
+        self,
+        a: Dict[str, int],
+        a_norm: float,
+        b: Dict[str, int],
+        b_norm: float
+    ) -> float:
+        """Cosine similarity between two sparse vectors"""
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(count * b.get(token, 0) for token, count in a.items())
+        return dot / (a_norm * b_norm)
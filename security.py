@@ -9,6 +9,42 @@ from logger import get_app_logger
 
 logger = get_app_logger("security")
 
+# Compiled once at import; these run on every chat message and upload
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNSAFE_FILENAME_RE = re.compile(r'[^a-zA-Z0-9._-]')
+
+# Additional patterns that indicate testing intent
+_TESTING_INTENT_RE = re.compile('|'.join([
+    r'\btest\b',
+    r'\bassert\b',
+    r'\bcheck\b',
+    r'\bvalidat',
+    r'\bverif',
+    r'how (to|do|can)',
+    r'generate.*test',
+    r'create.*test',
+    r'write.*test',
+    r'test.*case',
+    r'code.*coverage',
+    r'unit.*test',
+    r'regression.*test',
+    r'functional.*test'
+]))
+
+# Accepted Git URL formats
+_GIT_URL_FORMATS = [
+    re.compile(r'^https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(/.*)?\.git$'),
+    re.compile(r'^https?://github\.com/[\w-]+/[\w.-]+/?$'),
+    re.compile(r'^https?://gitlab\.com/[\w-]+/[\w.-]+/?$'),
+    re.compile(r'^https?://bitbucket\.org/[\w-]+/[\w.-]+/?$'),
+]
+
+# Localhost or private IPs
+_PRIVATE_HOST_RE = re.compile(
+    r'localhost|127\.0\.0\.1|192\.168\.|10\.|172\.(1[6-9]|2[0-9]|3[0-1])\.',
+    re.IGNORECASE
+)
+
 class SecurityManager:
     """Manage security and input sanitization"""
     
@@ -28,6 +64,7 @@ class SecurityManager:
             # System commands
             r"(eval|exec|system|subprocess\.call|os\.system)",
         ]
+        self._malicious_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.malicious_patterns]
         
         # Non-testing keywords that should trigger warnings
         self.non_testing_keywords = [
@@ -77,7 +114,7 @@ class SecurityManager:
         user_input = user_input.replace('\x00', '')
         
         # Remove excessive whitespace
-        user_input = re.sub(r'\s+', ' ', user_input)
+        user_input = _WHITESPACE_RE.sub(' ', user_input)
         
         # Remove control characters except newlines and tabs
         user_input = ''.join(
@@ -124,28 +161,7 @@ class SecurityManager:
             for keyword in self.testing_keywords
         )
         
-        # Additional patterns that indicate testing intent
-        testing_patterns = [
-            r'\btest\b',
-            r'\bassert\b',
-            r'\bcheck\b',
-            r'\bvalidat',
-            r'\bverif',
-            r'how (to|do|can)',
-            r'generate.*test',
-            r'create.*test',
-            r'write.*test',
-            r'test.*case',
-            r'code.*coverage',
-            r'unit.*test',
-            r'regression.*test',
-            r'functional.*test'
-        ]
-        
-        has_testing_pattern = any(
-            re.search(pattern, query_lower)
-            for pattern in testing_patterns
-        )
+        has_testing_pattern = _TESTING_INTENT_RE.search(query_lower) is not None
         
         is_valid = has_testing_keyword or has_testing_pattern
         
@@ -158,9 +174,9 @@ class SecurityManager:
     
     def _contains_malicious_pattern(self, text: str) -> bool:
         """Check if text contains malicious patterns"""
-        for pattern in self.malicious_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                logger.warning(f" Malicious pattern matched: {pattern}")
+        for regex in self._malicious_regexes:
+            if regex.search(text):
+                logger.warning(f" Malicious pattern matched: {regex.pattern}")
                 return True
         return False
     
@@ -219,32 +235,16 @@ class SecurityManager:
         logger.debug(f" Validating Git URL: {url}")
         
         # Check for valid URL format
-        git_url_patterns = [
-            r'^https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(/.*)?\.git$',
-            r'^https?://github\.com/[\w-]+/[\w.-]+/?$',
-            r'^https?://gitlab\.com/[\w-]+/[\w.-]+/?$',
-            r'^https?://bitbucket\.org/[\w-]+/[\w.-]+/?$',
-        ]
-        
-        is_valid_format = any(re.match(pattern, url) for pattern in git_url_patterns)
+        is_valid_format = any(pattern.match(url) for pattern in _GIT_URL_FORMATS)
         
         if not is_valid_format:
             logger.warning(f"⚠️ Invalid Git URL format: {url}")
             return False, "Invalid Git repository URL format"
         
         # Check for localhost or private IPs
-        private_patterns = [
-            r'localhost',
-            r'127\.0\.0\.1',
-            r'192\.168\.',
-            r'10\.',
-            r'172\.(1[6-9]|2[0-9]|3[0-1])\.'
-        ]
-        
-        for pattern in private_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                logger.warning(f" Attempted to access local/private repository: {url}")
-                return False, "Cannot access local or private repositories"
+        if _PRIVATE_HOST_RE.search(url):
+            logger.warning(f" Attempted to access local/private repository: {url}")
+            return False, "Cannot access local or private repositories"
         
         logger.debug(" Git URL validation passed")
         return True, ""
@@ -265,7 +265,7 @@ class SecurityManager:
         filename = filename.replace('..', '').replace('/', '_').replace('\\', '_')
         
         # Keep only alphanumeric, underscore, hyphen, and dot
-        filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
+        filename = _UNSAFE_FILENAME_RE.sub('_', filename)
         
         # Limit length
         if len(filename) > 255:
@@ -1,11 +1,36 @@
-from typing import Dict, List
-from llm_handler import LLMHandler
+import asyncio
+import concurrent.futures
+import gc
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from llm_handler import LLMHandler, submit_coroutine
 from rag_system import RAGSystem
 from code_chunker import CodeChunker
 from logger import get_app_logger
+from config import config
 
 logger = get_app_logger("test_generator")
 
+# Seconds between progress checks while chunk requests are running
+PROGRESS_POLL_INTERVAL = 0.2
+
+
+@contextmanager
+def _gc_paused():
+    """Suspend automatic garbage collection for an allocation-heavy section"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+        collected = gc.collect()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("GC after chunking: collected %d objects, gen stats %s", collected, gc.get_stats())
+
+
 class TestGenerator:
     """Generate unit and functional test cases using code chunking"""
     
@@ -19,15 +44,20 @@ class TestGenerator:
         self,
         parsed_data: Dict[str, Dict],
         test_types: List[str],
-        module_level: bool = False
+        module_level: bool = False,
+        progress_callback: Optional[Callable[[float], None]] = None
     ) -> Dict[str, List[Dict]]:
         """
         Generate test cases based on parsed code using chunking
         
+        All chunk-level LLM requests (across files and test types) are
+        dispatched concurrently; this wrapper keeps the call synchronous.
+        
         Args:
             parsed_data: Dictionary of parsed code files
             test_types: List of test types to generate (Unit Test, Functional Test)
             module_level: Whether to generate module-level tests
+            progress_callback: Optional callable receiving completion fraction (0-1)
             
         Returns:
             Dictionary mapping test types to lists of test cases
@@ -41,26 +71,35 @@ class TestGenerator:
             'Functional Test': []
         }
         
-        # Generate unit tests
-        if 'Unit Test' in test_types:
-            logger.info("Generating unit tests with chunking...")
-            try:
-                all_tests['Unit Test'] = self._generate_unit_tests_chunked(parsed_data)
-                logger.info(f"✅ Generated {len(all_tests['Unit Test'])} unit tests")
-            except Exception as e:
-                logger.error(f"Error generating unit tests: {e}", exc_info=True)
-        
-        # Generate functional tests
-        if 'Functional Test' in test_types:
-            logger.info("Generating functional tests with chunking...")
-            try:
-                all_tests['Functional Test'] = self._generate_functional_tests_chunked(
-                    parsed_data,
-                    module_level
-                )
-                logger.info(f"✅ Generated {len(all_tests['Functional Test'])} functional tests")
-            except Exception as e:
-                logger.error(f"Error generating functional tests: {e}", exc_info=True)
+        # Collect (test_type, chunk, filename, scope) jobs
+        jobs = []
+        
+        # Chunking is allocation-heavy and CPU-bound; automatic collection is
+        # process-wide, so it is only paused for this step and not while
+        # waiting on the network
+        with _gc_paused():
+            if 'Unit Test' in test_types:
+                logger.info("Chunking code for unit tests...")
+                try:
+                    jobs.extend(self._unit_test_jobs(parsed_data))
+                except Exception as e:
+                    logger.error(f"Error preparing unit tests: {e}", exc_info=True)
+        
+            if 'Functional Test' in test_types:
+                logger.info("Chunking code for functional tests...")
+                try:
+                    jobs.extend(self._functional_test_jobs(parsed_data, module_level))
+                except Exception as e:
+                    logger.error(f"Error preparing functional tests: {e}", exc_info=True)
+        
+        logger.info(f"Dispatching {len(jobs)} chunk requests (concurrency={config.LLM_CONCURRENCY})")
+        results = self._wait_for_jobs(jobs, progress_callback)
+        
+        for (test_type, _chunk, _filename, scope), chunk_tests in zip(jobs, results):
+            if scope:
+                for test in chunk_tests:
+                    test['scope'] = scope
+            all_tests[test_type].extend(chunk_tests)
         
         # Log summary
         total = sum(len(tests) for tests in all_tests.values())
@@ -72,17 +111,68 @@ class TestGenerator:
         
         return all_tests
     
+    def _wait_for_jobs(
+        self,
+        jobs: List[Tuple],
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> List[List[Dict]]:
+        """
+        Run chunk jobs on the shared LLM event loop and wait for the results
+        
+        Progress is reported from the calling thread, because Streamlit
+        elements can only be updated from the script thread.
+        """
+        fractions = []
+        future = submit_coroutine(self._run_jobs(jobs, fractions.append))
+        reported = 0
+        
+        try:
+            while True:
+                finished = not concurrent.futures.wait([future], timeout=PROGRESS_POLL_INTERVAL).not_done
+                if progress_callback and len(fractions) > reported:
+                    reported = len(fractions)
+                    progress_callback(fractions[-1])
+                if finished:
+                    return future.result()
+        finally:
+            # Stop outstanding requests if the script run is interrupted
+            future.cancel()
     
-   
-
+    async def _run_jobs(
+        self,
+        jobs: List[Tuple],
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> List[List[Dict]]:
+        """Run chunk jobs concurrently, bounded by config.LLM_CONCURRENCY"""
+        semaphore = asyncio.Semaphore(max(1, config.LLM_CONCURRENCY))
+        completed = 0
+        
+        async def _gen_one(test_type: str, chunk: Dict, filename: str) -> List[Dict]:
+            nonlocal completed
+            async with semaphore:
+                try:
+                    chunk_tests = await self.llm.agenerate_tests_for_chunk(chunk, test_type, filename)
+                    logger.info(f"    ✅ {chunk['name']}: generated {len(chunk_tests)} tests")
+                except Exception as e:
+                    logger.error(f"    ❌ Error for {chunk['name']}: {e}")
+                    chunk_tests = []
+            
+            completed += 1
+            if progress_callback:
+                progress_callback(completed / len(jobs))
+            return chunk_tests
+        
+        return await asyncio.gather(
+            *(_gen_one(test_type, chunk, filename) for test_type, chunk, filename, _ in jobs)
+        )
     
-    def _generate_unit_tests_chunked(self, parsed_data: Dict) -> List[Dict]:
-        """Generate unit tests using code chunking"""
+    def _unit_test_jobs(self, parsed_data: Dict) -> List[Tuple]:
+        """Chunk every file and build unit test jobs"""
         logger.info("="*60)
         logger.info("UNIT TEST GENERATION")
         logger.info("="*60)
         
-        all_unit_tests = []
+        jobs = []
         
         for filename, data in parsed_data.items():
             logger.info(f"\n📝 Processing file: {filename}")
@@ -95,41 +185,24 @@ class TestGenerator:
             for chunk_type, count in chunk_summary['by_type'].items():
                 logger.info(f"  - {chunk_type}: {count}")
             
-            # Generate tests for each chunk
-            for i, chunk in enumerate(chunks, 1):
-                logger.info(f"  Chunk {i}/{len(chunks)}: {chunk['name']} ({chunk['type']})")
-                
-                try:
-                    chunk_tests = self.llm.generate_tests_for_chunk(
-                        chunk,
-                        "Unit Test",
-                        filename
-                    )
-                    
-                    logger.info(f"    ✅ Generated {len(chunk_tests)} tests")
-                    all_unit_tests.extend(chunk_tests)
-                    
-                except Exception as e:
-                    logger.error(f"    ❌ Error: {e}")
-                    continue
+            jobs.extend(("Unit Test", chunk, filename, None) for chunk in chunks)
         
-        logger.info(f"\n📊 Total unit tests: {len(all_unit_tests)}")
-        return all_unit_tests
+        return jobs
     
-    def _generate_functional_tests_chunked(self, parsed_data: Dict, module_level: bool) -> List[Dict]:
-        """Generate functional tests using code chunking"""
+    def _functional_test_jobs(self, parsed_data: Dict, module_level: bool) -> List[Tuple]:
+        """Chunk code (per module or per file) and build functional test jobs"""
         logger.info("="*60)
         logger.info("FUNCTIONAL TEST GENERATION")
         logger.info("="*60)
         logger.info(f"Module level: {module_level}")
         
-        all_functional_tests = []
+        jobs = []
         
         if module_level:
             logger.info("📦 Generating MODULE-LEVEL functional tests")
             
             # Combine all files and chunk
-            all_code = ""
+            code_parts = []
             combined_data = {
                 'language': 'unknown',
                 'functions': [],
@@ -138,39 +211,20 @@ class TestGenerator:
             }
             
             for filename, data in parsed_data.items():
-                all_code += f"\n\n# File: {filename}\n{data['code']}"
+                code_parts.append(f"\n\n# File: {filename}\n{data['code']}")
                 combined_data['functions'].extend(data.get('functions', []))
                 combined_data['classes'].extend(data.get('classes', []))
                 if not combined_data['language'] or combined_data['language'] == 'unknown':
                     combined_data['language'] = data.get('language', 'unknown')
             
+            all_code = "".join(code_parts)
             combined_data['code'] = all_code
             
             # Chunk the combined code
             chunks = self.chunker.chunk_code(all_code, combined_data)
             logger.info(f"Created {len(chunks)} module chunks")
             
-            # Generate functional tests for each chunk
-            for i, chunk in enumerate(chunks, 1):
-                logger.info(f"  Module chunk {i}/{len(chunks)}: {chunk['name']}")
-                
-                try:
-                    chunk_tests = self.llm.generate_tests_for_chunk(
-                        chunk,
-                        "Functional Test",
-                        "module"
-                    )
-                    
-                    # Mark as module-level tests
-                    for test in chunk_tests:
-                        test['scope'] = 'module'
-                    
-                    logger.info(f"    ✅ Generated {len(chunk_tests)} tests")
-                    all_functional_tests.extend(chunk_tests)
-                    
-                except Exception as e:
-                    logger.error(f"    ❌ Error: {e}")
-                    continue
+            jobs.extend(("Functional Test", chunk, "module", "module") for chunk in chunks)
         
         else:
             logger.info("📄 Generating FILE-LEVEL functional tests")
@@ -183,33 +237,9 @@ class TestGenerator:
                 chunks = self.chunker.chunk_code(data['code'], data)
                 logger.info(f"Created {len(chunks)} chunks")
                 
-                # Generate functional tests for each chunk
-                for i, chunk in enumerate(chunks, 1):
-                    logger.info(f"  Chunk {i}/{len(chunks)}: {chunk['name']}")
-                    
-                    try:
-                        chunk_tests = self.llm.generate_tests_for_chunk(
-                            chunk,
-                            "Functional Test",
-                            filename
-                        )
-                        
-                        # Mark as file-level tests
-                        for test in chunk_tests:
-                            test['scope'] = 'file'
-                        
-                        logger.info(f"    ✅ Generated {len(chunk_tests)} tests")
-                        all_functional_tests.extend(chunk_tests)
-                        
-                    except Exception as e:
-                        logger.error(f"    ❌ Error: {e}")
-                        continue
-        
-        logger.info("="*60)
-        logger.info(f"📊 Total functional tests: {len(all_functional_tests)}")
-        logger.info("="*60)
+                jobs.extend(("Functional Test", chunk, filename, "file") for chunk in chunks)
         
-        return all_functional_tests
+        return jobs
     
     def generate_test_summary(self, all_tests: Dict) -> Dict:
         """Generate summary statistics for generated tests"""